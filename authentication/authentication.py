@@ -1,3 +1,11 @@
+import wordhash
+from qinverse import LinearInverse
+from stream import AuthenticationHash
+
+# messages with at least this many hex characters are hashed on 32-bit integers instead of hex strings
+LONG_MESSAGE_LENGTH = 256
+
+
 class HexString(str):
     """
     Extends the string class to be able to process XORs
@@ -87,6 +95,11 @@ class Authentication:
         if (l := len(hex) % 8) != 0:
             hex += "f" * (8 - l)
 
+        if len(hex) >= LONG_MESSAGE_LENGTH:
+            state = wordhash.absorb(int(self.internalState, 16), bytes.fromhex(hex))
+            self.internalState = HexString(f"{state:#x}")
+            return self.Q(self.internalState)
+
         for data in [hex[i:i + 8] for i in range(0, len(hex), 8)]:
             buffer.writeBuffer(HexString(data))
             self.handleFilledBuffer(buffer)
@@ -112,28 +125,39 @@ class Authentication:
         self.reset()
         assert self.H(HexString("ABCDE".encode().hex())) == "0x2f69af58"
         self.reset()
+        for message, mic in [("", 0xded7e2d2), ("A", 0x5d725f7f), ("AB", 0x5f3b5f7f), ("ABC", 0x5f39137f),
+                             ("ABCD", 0x5f391128), ("ABCDE", 0x2f69af58)]:
+            assert wordhash.H(message.encode()) == mic
+            assert AuthenticationHash(message.encode()).intdigest() == mic
+        long_message = bytes(range(256)) * 4 + b"ABCDE"
+        assert wordhash.H(long_message) == 0xe407b936
+        assert self.H(HexString(long_message.hex())) == "0xe407b936"
+        self.reset()
         print("All tests passed")
         print()
 
 
-auth = Authentication()
-print("Testing code...")
-auth.test()
+if __name__ == "__main__":
+    auth = Authentication()
+    print("Testing code...")
+    auth.test()
 
-print("Proceeding to Length Extension Attack...")
-# The following code uses hex values from the Go Code (speed :D)
-# candidates = [0x332e2800, 0xccd1d7ff]
+    print("Proceeding to Length Extension Attack...")
+    # Q is linear over GF(2), so the candidates for the last state are found by Gaussian elimination
+    # instead of the Go brute force
+    candidates = LinearInverse().preimages(0x632e4e5c)
+    assert candidates == [0x332e2800, 0xccd1d7ff]
 
-candidate = HexString("ccd1d7ff")
+    candidate = HexString(f"{candidates[1]:x}")
 
-assert auth.Q(candidate) == "0x632e4e5c"
-print("MIC for abcd: ", auth.Q(candidate))
+    assert auth.Q(candidate) == "0x632e4e5c"
+    print("MIC for abcd: ", auth.Q(candidate))
 
-assert auth.Q(auth.Q(candidate ^ b"ef\xff\xff".hex())) == "0xf6b8802"
-print("MIC for abcdef: ", auth.Q(auth.Q(candidate ^ b"ef\xff\xff".hex())))
+    assert auth.Q(auth.Q(candidate ^ b"ef\xff\xff".hex())) == "0xf6b8802"
+    print("MIC for abcdef: ", auth.Q(auth.Q(candidate ^ b"ef\xff\xff".hex())))
 
-assert auth.Q(auth.Q(auth.Q(candidate ^ b"efgh".hex()) ^ b"ijk\xff".hex())) == "0x2638a819"
-print("MIC for abcdefghijk: ", auth.Q(auth.Q(auth.Q(candidate ^ b"efgh".hex()) ^ b"ijk\xff".hex())))
+    assert auth.Q(auth.Q(auth.Q(candidate ^ b"efgh".hex()) ^ b"ijk\xff".hex())) == "0x2638a819"
+    print("MIC for abcdefghijk: ", auth.Q(auth.Q(auth.Q(candidate ^ b"efgh".hex()) ^ b"ijk\xff".hex())))
 
-# Own message: abcdROFL (I can use ROFL too)
-print("MIC for abcdROFL: ", auth.Q(auth.Q(candidate ^ b"ROFL".hex())))
+    # Own message: abcdROFL (I can use ROFL too)
+    print("MIC for abcdROFL: ", auth.Q(auth.Q(candidate ^ b"ROFL".hex())))
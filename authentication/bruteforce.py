@@ -0,0 +1,90 @@
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Callable
+
+import numpy as np
+
+# approximate bytes needed per candidate: the input chunk, two temporaries of the function and the match mask
+BYTES_PER_CANDIDATE = 4 * 3 + 1
+SPACE = 1 << 32
+
+
+class RotationQ:
+    """
+    Vectorized variant of the static hash function Q, b XOR (b rotated left), on uint32 arrays.
+    Being a plain class it can be pickled and sent to worker processes.
+    """
+
+    def __init__(self, rotation: int = 17):
+        self.rotation = np.uint32(rotation)
+        self.complement = np.uint32(32 - rotation)
+
+    def __call__(self, b: np.ndarray) -> np.ndarray:
+        rotated = b << self.rotation
+        rotated |= b >> self.complement
+        rotated ^= b
+        return rotated
+
+
+def chunkSize(memory_budget: int, processes: int = 1, maximum: int = 1 << 16) -> int:
+    """
+    Determines the largest power-of-two chunk that keeps all processes within the memory budget.
+    The default maximum keeps a chunk and its temporaries in the CPU caches, larger chunks are slower.
+    :param memory_budget: available memory in bytes
+    :param processes: number of processes evaluating chunks at the same time
+    :param maximum: upper bound for the chunk size
+    :return: number of candidates per chunk
+    """
+    candidates = memory_budget // (BYTES_PER_CANDIDATE * processes)
+    if candidates < 1:
+        raise ValueError(f"A memory budget of {memory_budget} bytes is too small for {processes} processes")
+    return min(1 << (candidates.bit_length() - 1), maximum)
+
+
+def searchChunk(function: Callable[[np.ndarray], np.ndarray], target: int, start: int, size: int) -> list[int]:
+    """
+    Evaluates the function on the candidates start, ..., start + size - 1 and returns all matches
+    :param function: vectorized function on uint32 arrays
+    :param target: value to look for
+    :param start: first candidate of the chunk
+    :param size: number of candidates in the chunk
+    :return: list of candidates mapped to the target
+    """
+    candidates = np.arange(size, dtype=np.uint32)
+    candidates += np.uint32(start)
+    return [int(candidate) for candidate in np.flatnonzero(function(candidates) == np.uint32(target)) + start]
+
+
+def search(target: int, function: Callable[[np.ndarray], np.ndarray] = RotationQ(), processes: int = 1,
+           memory_budget: int = 1 << 30) -> list[int]:
+    """
+    Exhaustively searches the 32-bit space for every input that the function maps to the target
+    :param target: value to look for
+    :param function: vectorized function on uint32 arrays, has to be picklable if processes > 1
+    :param processes: number of worker processes the chunks are sharded across
+    :param memory_budget: memory in bytes all processes together may use for candidates
+    :return: sorted list of all matching inputs
+    """
+    size = chunkSize(memory_budget, processes)
+    starts = range(0, SPACE, size)
+    task = partial(searchChunk, function, target, size=size)
+
+    if processes == 1:
+        results = list(map(task, starts))
+    else:
+        with ProcessPoolExecutor(processes) as executor:
+            results = list(executor.map(task, starts, chunksize=256))
+    return sorted(match for matches in results for match in matches)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Vectorized brute force of the static hash function Q")
+    parser.add_argument("value", type=lambda x: int(x, 16), help="Hash value given in hex")
+    parser.add_argument("-r", "--rotation", type=int, default=17, help="Left rotation of the Q variant")
+    parser.add_argument("-p", "--processes", type=int, default=1, help="Number of worker processes")
+    parser.add_argument("-m", "--memory", type=int, default=1024, help="Memory budget in MiB")
+
+    args = parser.parse_args()
+    for candidate in search(args.value, RotationQ(args.rotation), args.processes, args.memory << 20):
+        print(f"Found candidate 0x{candidate:x} during lookup for value 0x{args.value:x}")
@@ -0,0 +1,76 @@
+import argparse
+import struct
+from dataclasses import dataclass
+from typing import Iterable, Iterator
+
+import wordhash
+from qinverse import LinearInverse
+
+
+@dataclass(frozen=True, slots=True)
+class Forgery:
+    message: bytes
+    mic: int
+    state: int
+
+
+def glue(message: bytes) -> bytes:
+    """
+    Pads the known message the same way the hash function does, forged messages continue after this padding
+    :param message: known message
+    :return: message padded with 0xff bytes to a multiple of 4 bytes
+    """
+    return message + wordhash.PADDING[:-len(message) % 4]
+
+
+def forge(message: bytes, mic: int, suffixes: Iterable[bytes]) -> Iterator[Forgery]:
+    """
+    Length extension forgery of the authentication MAC for many suffixes in one pass. The candidate internal
+    states are recovered once from the MIC and, per candidate, the states after the full words of the previous
+    suffix are kept so that a suffix sharing leading words with its predecessor only hashes the rest.
+    Sorted suffixes therefore share the most work.
+    :param message: known message
+    :param mic: known MIC of the message
+    :param suffixes: data to append to the message
+    :return: forged (message, MIC) pairs, one per suffix and candidate state
+    """
+    prefix = glue(message)
+    # chains[c][i] is the state of candidate c after the first i words of the previous suffix
+    chains = [[state] for state in LinearInverse().preimages(mic)]
+    previous = b""
+
+    for suffix in suffixes:
+        full = len(suffix) - len(suffix) % 4
+        shared = 0
+        while 4 * shared < min(full, len(previous) - len(previous) % 4) and \
+                previous[4 * shared:4 * shared + 4] == suffix[4 * shared:4 * shared + 4]:
+            shared += 1
+
+        for chain in chains:
+            del chain[shared + 1:]
+            state = chain[-1]
+            for (word,) in struct.iter_unpack(">I", memoryview(suffix)[4 * shared:full]):
+                state = wordhash.Q(state ^ word)
+                chain.append(state)
+            if full != len(suffix):
+                state = wordhash.Q(state ^ int.from_bytes(glue(suffix[full:]), 'big'))
+            yield Forgery(prefix + suffix, wordhash.Q(state), chain[0])
+
+        previous = suffix
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Length extension forgeries for the authentication MAC")
+    parser.add_argument("-m", "--message", required=True, help="Known message given in utf-8")
+    parser.add_argument("--mic", required=True, type=lambda x: int(x, 16), help="Known MIC given in hex")
+    parser.add_argument("-s", "--suffix", nargs="*", default=[], help="Suffixes to append given in utf-8")
+    parser.add_argument("-f", "--file", help="File with one utf-8 suffix per line")
+
+    args = parser.parse_args()
+    suffixes = [suffix.encode() for suffix in args.suffix]
+    if args.file:
+        with open(args.file, 'rb') as f:
+            suffixes += [line.rstrip(b"\r\n") for line in f]
+
+    for forgery in forge(args.message.encode(), args.mic, sorted(suffixes)):
+        print(f"{forgery.message.hex()}\t0x{forgery.mic:x}\t0x{forgery.state:x}")
@@ -0,0 +1,79 @@
+import argparse
+from typing import Callable
+
+import wordhash
+
+
+class LinearInverse:
+    """
+    Inverts a GF(2)-linear function on fixed-width words by Gaussian elimination on its bit-matrix.
+    The matrix is built once from the images of the unit vectors, afterwards every preimage of a value is
+    found with at most one reduction per bit.
+    """
+
+    def __init__(self, function: Callable[[int], int] = wordhash.Q, width: int = 32):
+        self.width = width
+        # pivot bit -> (reduced image, combination of input bits producing it)
+        self.basis: dict[int, tuple[int, int]] = {}
+        # combinations of input bits that are mapped to zero
+        self.kernel: list[int] = []
+        images = [function(1 << i) for i in range(width)]
+
+        for i in range(width):
+            image, combination = images[i], 1 << i
+            while image:
+                pivot = image.bit_length() - 1
+                if pivot not in self.basis:
+                    self.basis[pivot] = (image, combination)
+                    break
+                image ^= self.basis[pivot][0]
+                combination ^= self.basis[pivot][1]
+            else:
+                self.kernel.append(combination)
+
+        # a linear function is determined by the images of the unit vectors, check some mixed inputs against them
+        mask = (1 << width) - 1
+        for sample in (0, mask, mask // 3, mask // 5):
+            expected = 0
+            for i in range(width):
+                if (sample >> i) & 1:
+                    expected ^= images[i]
+            if function(sample) != expected:
+                raise ValueError("The given function is not linear over GF(2)")
+
+    def solve(self, value: int) -> int | None:
+        """
+        Finds a single preimage of the given value
+        :param value: image to invert
+        :return: preimage or None if the value is not in the image of the function
+        """
+        combination = 0
+        while value:
+            if (pivot := value.bit_length() - 1) not in self.basis:
+                return None
+            value ^= self.basis[pivot][0]
+            combination ^= self.basis[pivot][1]
+        return combination
+
+    def preimages(self, value: int) -> list[int]:
+        """
+        Finds every preimage of the given value by adding all combinations of the kernel to one solution
+        :param value: image to invert
+        :return: sorted list of all preimages, empty if there are none
+        """
+        if (solution := self.solve(value)) is None:
+            return []
+        solutions = [solution]
+        for k in self.kernel:
+            solutions += [s ^ k for s in solutions]
+        return sorted(solutions)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Finds all preimages of the static hash function Q")
+    parser.add_argument("value", type=lambda x: int(x, 16), help="Hash value given in hex")
+
+    args = parser.parse_args()
+    for preimage in LinearInverse().preimages(args.value):
+        assert wordhash.Q(preimage) == args.value
+        print(f"Found candidate 0x{preimage:x} for value 0x{args.value:x}")
@@ -0,0 +1,68 @@
+import wordhash
+from qinverse import LinearInverse
+
+
+class AuthenticationHash:
+    """
+    hashlib-style streaming object for the authentication hash function.
+    The internal state is kept as a 32-bit integer and at most 3 bytes of an incomplete word are buffered,
+    so messages of any length are hashed in constant memory.
+    """
+    name = "authentication"
+    digest_size = 4
+    block_size = 4
+
+    def __init__(self, data: bytes = b"", state: int = wordhash.INITIAL_STATE):
+        self.state = state
+        self.pending = b""
+        self.update(data)
+
+    @classmethod
+    def fromMIC(cls, mic: int) -> list["AuthenticationHash"]:
+        """
+        Resumes hashing after a message with the given MIC. Since the MIC is Q of the internal state, there is
+        one object per preimage of Q. Data passed to them continues the message after its padded last word.
+        :param mic: known MIC of a message
+        :return: list of hash objects, one per candidate internal state
+        """
+        return [cls(state=state) for state in LinearInverse().preimages(mic)]
+
+    def update(self, data: bytes | bytearray | memoryview):
+        """
+        Appends data to the hashed message
+        :param data: bytes-like object of any length
+        """
+        view = memoryview(data)
+        if self.pending:
+            missing = 4 - len(self.pending)
+            self.pending += view[:missing].tobytes()
+            view = view[missing:]
+            if len(self.pending) < 4:
+                return
+            self.state = wordhash.Q(self.state ^ int.from_bytes(self.pending, 'big'))
+            self.pending = b""
+
+        full = len(view) - len(view) % 4
+        self.state = wordhash.absorb(self.state, view[:full])
+        self.pending = view[full:].tobytes()
+
+    def intdigest(self) -> int:
+        """
+        Finalizes a copy of the state, padding an incomplete last word with 0xff bytes
+        :return: hash value as integer
+        """
+        state = self.state
+        if self.pending:
+            state = wordhash.Q(state ^ int.from_bytes(self.pending + wordhash.PADDING[len(self.pending) - 1:], 'big'))
+        return wordhash.Q(state)
+
+    def digest(self) -> bytes:
+        return self.intdigest().to_bytes(self.digest_size, 'big')
+
+    def hexdigest(self) -> str:
+        return self.digest().hex()
+
+    def copy(self) -> "AuthenticationHash":
+        other = type(self)(state=self.state)
+        other.pending = self.pending
+        return other
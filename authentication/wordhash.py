@@ -0,0 +1,42 @@
+import struct
+
+INITIAL_STATE = 0x524f464c  # LOL
+ROTATION = 17
+MASK = 0xFFFFFFFF
+PADDING = b"\xff\xff\xff"
+
+
+def Q(b: int) -> int:
+    """
+    Static hash function Q on 32-bit integers
+    :param b: input word
+    :return: b XOR (b rotated left by 17 bits)
+    """
+    return b ^ (((b << ROTATION) | (b >> (32 - ROTATION))) & MASK)
+
+
+def absorb(state: int, data: bytes | bytearray | memoryview) -> int:
+    """
+    Processes complete 32-bit big-endian words into the internal state without copying the input
+    :param state: internal state before the words
+    :param data: input whose length is a multiple of 4 bytes
+    :return: internal state after the words
+    """
+    for (word,) in struct.iter_unpack(">I", data):
+        state = Q(state ^ word)
+    return state
+
+
+def H(data: bytes | bytearray | memoryview, state: int = INITIAL_STATE) -> int:
+    """
+    Integer implementation of the authentication hash function, the last word is padded with 0xff bytes
+    :param data: input bytes
+    :param state: internal state to start from
+    :return: hash value
+    """
+    view = memoryview(data)
+    full = len(view) - len(view) % 4
+    state = absorb(state, view[:full])
+    if full != len(view):
+        state = Q(state ^ int.from_bytes(view[full:].tobytes() + PADDING[:4 - len(view) + full], 'big'))
+    return Q(state)
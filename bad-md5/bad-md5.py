@@ -1,17 +1,23 @@
 import argparse
 import timeit
-from hashlib import md5
+import hashlib
 import random
 import string
 
+from fastcollision import fastCollision
+from rho import RhoSearch
 
-def H(input_text: str) -> str:
+
+def H(input_text: str, bits: int = 32, algorithm: str = "md5") -> str:
     """
-    Calculates the MD5 hash of a given string and returns its first 32 bits
+    Calculates the MD5 hash of a given string and returns its first 32 bits (or the given number of bits)
     :param str input_text:
-    :return: Hash value consisting of the first 32 bits of the MD5 hash
+    :param int bits: Number of leading bits of the hash to keep
+    :param str algorithm: Name of the hashlib algorithm used instead of MD5
+    :return: Hash value consisting of the first bits of the hash as hex string
     """
-    return md5(input_text.encode()).hexdigest()[:8]
+    digest = hashlib.new(algorithm, input_text.encode()).digest()
+    return f"{int.from_bytes(digest, 'big') >> (8 * len(digest) - bits):0{(bits + 3) // 4}x}"
 
 
 def testHashFunction() -> None:
@@ -36,11 +42,12 @@ def generateMessageText(prefix: str, length: int) -> str:
     return prefix + "".join(random.choices(string.ascii_letters + string.digits, k=length))
 
 
-def generateCollision(prefix: str, message_length: int) -> None:
+def generateCollision(prefix: str, message_length: int, bits: int = 32) -> None:
     """
     Brute-force algorithm to generate a hash collision
     :param str prefix: Prefix for the message
     :param int message_length: Length of the message used for hashing
+    :param int bits: Number of leading bits of the MD5 hash that have to collide
     """
     print("Searching for hash collisions:")
     hash_table = dict()
@@ -48,22 +55,58 @@ def generateCollision(prefix: str, message_length: int) -> None:
     start = timeit.default_timer()
     i = 0
     generated_text = generateMessageText(prefix, message_length)
-    generated_hash = H(generated_text)
+    generated_hash = H(generated_text, bits)
 
     while generated_hash not in hash_table.keys():
         hash_table[generated_hash] = generated_text
         i += 1
         generated_text = generateMessageText(prefix, message_length)
-        generated_hash = H(generated_text)
+        generated_hash = H(generated_text, bits)
 
     end = timeit.default_timer()
 
     print(f"\t{generated_text}\t—\t{generated_hash}")
     message = hash_table[generated_hash]
-    print(f"\t{message}\t—\t{H(message)}\n")
+    print(f"\t{message}\t—\t{H(message, bits)}\n")
     print(f"This collision was found after {i} iterations and in {end - start} seconds")
 
 
+def generateFastCollision(prefix: str, message_length: int, bits: int = 32) -> None:
+    """
+    Brute-force algorithm to generate a hash collision using counter candidates and a cached prefix state
+    :param str prefix: Prefix for the message
+    :param int message_length: Length of the message used for hashing
+    :param int bits: Number of leading bits of the MD5 hash that have to collide
+    """
+    print("Searching for hash collisions:")
+    start = timeit.default_timer()
+    collision = fastCollision(prefix, message_length, bits)
+    end = timeit.default_timer()
+
+    print(f"\t{collision.first}\t—\t{H(collision.first, bits)}")
+    print(f"\t{collision.second}\t—\t{H(collision.second, bits)}\n")
+    print(f"This collision was found after {collision.iterations} iterations and in {end - start} seconds")
+
+
+def generateRhoCollision(prefix: str, message_length: int, bits: int, jobs: int = 1) -> None:
+    """
+    Memory-light algorithm to generate a collision of the first bits of the MD5 hash using Pollard's rho
+    :param str prefix: Prefix for the message
+    :param int message_length: Length of the message used for hashing
+    :param int bits: Number of leading bits of the MD5 hash that have to collide
+    :param int jobs: Number of worker processes, values above 1 run the walks in a process pool
+    """
+    print("Searching for hash collisions using Pollard's rho:")
+    start = timeit.default_timer()
+    search = RhoSearch(prefix, message_length, bits)
+    collision = search.parallelSearch(jobs) if jobs > 1 else search.search()
+    end = timeit.default_timer()
+
+    for message in (collision.first, collision.second):
+        print(f"\t{message}\t—\t{H(message, bits)}")
+    print(f"\nThis collision was found after {collision.iterations} iterations and in {end - start} seconds")
+
+
 def main():
     """
     Main method that parses the command line arguments, tests the hash function and generates a hash collision
@@ -71,10 +114,23 @@ def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("-p", "--prefix", help="Prefix for the message", required=True)
     parser.add_argument("-l", "--message_length", type=int, help="Length of the message used for hashing", default=64)
+    parser.add_argument("-f", "--fast", action="store_true",
+                        help="Enumerate counter candidates on a cached prefix state (table mode only)")
+    parser.add_argument("-m", "--mode", choices=["table", "rho"], default="table",
+                        help="Collision search using a hash table or memory-light using Pollard's rho")
+    parser.add_argument("-b", "--bits", type=int, default=32,
+                        help="Number of leading hash bits that have to collide")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="Number of worker processes for the collision search (rho mode only)")
 
     args = parser.parse_args()
     testHashFunction()
-    generateCollision(args.prefix, args.message_length)
+    if args.mode == "rho":
+        generateRhoCollision(args.prefix, args.message_length, args.bits, args.jobs)
+    elif args.fast:
+        generateFastCollision(args.prefix, args.message_length, args.bits)
+    else:
+        generateCollision(args.prefix, args.message_length, args.bits)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,112 @@
+import argparse
+import csv
+import hashlib
+import math
+import statistics
+import timeit
+import tracemalloc
+
+from fastcollision import fastCollision
+from rho import Collision, RhoSearch
+
+FIELDS = ["algorithm", "bits", "mode", "repetition", "iterations", "seconds", "peak_bytes"]
+
+
+def birthdayBound(bits: int) -> float:
+    """
+    Expected number of hashed candidates until the first collision of a random function with the given width
+    :param int bits: Width of the hash in bits
+    :return: Expected number of iterations, sqrt(pi/2 * 2^bits)
+    """
+    return math.sqrt(math.pi / 2 * 2 ** bits)
+
+
+def search(prefix: str, message_length: int, bits: int, algorithm: str, mode: str) -> Collision:
+    """
+    Runs a single deterministic collision search
+    :param str prefix: Prefix for the messages
+    :param int message_length: Length of the message following the prefix
+    :param int bits: Number of leading bits that have to collide
+    :param str algorithm: Name of the hashlib algorithm
+    :param str mode: "table" for the counter hash-table search, "rho" for Pollard's rho
+    :return: Found collision
+    """
+    if mode == "rho":
+        return RhoSearch(prefix, message_length, bits, algorithm=algorithm).search()
+    return fastCollision(prefix, message_length, bits, algorithm)
+
+
+def measure(prefix: str, message_length: int, bits: int, algorithm: str, mode: str, memory: bool) -> dict:
+    """
+    Measures iterations and wall time of one search and, since searches are deterministic, its peak memory
+    in a second traced run so that tracing does not distort the timing
+    :return: CSV row without the repetition column
+    """
+    start = timeit.default_timer()
+    collision = search(prefix, message_length, bits, algorithm, mode)
+    end = timeit.default_timer()
+
+    peak = ""
+    if memory:
+        tracemalloc.start()
+        search(prefix, message_length, bits, algorithm, mode)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return {"algorithm": algorithm, "bits": bits, "mode": mode, "iterations": collision.iterations,
+            "seconds": end - start, "peak_bytes": peak}
+
+
+def run(prefix: str, message_length: int, widths: list[int], algorithms: list[str], mode: str, repetitions: int,
+        out_filename: str, memory: bool = True) -> None:
+    """
+    Runs repeated collision searches for all widths and algorithms, writes every run to a CSV file and
+    prints the measured mean compared with the birthday bound
+    """
+    with open(out_filename, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS)
+        writer.writeheader()
+
+        print(f"{'algorithm':>10} {'bits':>4} {'mean iterations':>16} {'birthday bound':>16} {'ratio':>6} "
+              f"{'mean seconds':>13}")
+        for algorithm in algorithms:
+            for bits in widths:
+                rows = []
+                for repetition in range(repetitions):
+                    # every repetition uses its own prefix, otherwise the deterministic searches would repeat
+                    row = measure(f"{prefix}{repetition}:", message_length, bits, algorithm, mode, memory)
+                    row["repetition"] = repetition
+                    writer.writerow(row)
+                    rows.append(row)
+                f.flush()
+
+                mean = statistics.mean(row["iterations"] for row in rows)
+                bound = birthdayBound(bits)
+                seconds = statistics.mean(row["seconds"] for row in rows)
+                print(f"{algorithm:>10} {bits:>4} {mean:>16.0f} {bound:>16.0f} {mean / bound:>6.2f} {seconds:>13.4f}")
+
+
+def main():
+    """
+    Main method that parses the command line arguments and runs the benchmark
+    """
+    parser = argparse.ArgumentParser(description="Measures collision search time for truncated hashes")
+    parser.add_argument("-p", "--prefix", help="Prefix for the messages", default="")
+    parser.add_argument("-l", "--message_length", type=int, help="Length of the message used for hashing", default=16)
+    parser.add_argument("-b", "--bits", type=int, nargs="+", default=[16, 20, 24, 28, 32],
+                        help="Truncation widths in bits")
+    parser.add_argument("-a", "--algorithm", nargs="+", default=["md5"], help="hashlib algorithms to benchmark",
+                        choices=[a for a in sorted(hashlib.algorithms_available) if not a.startswith("shake")])
+    parser.add_argument("-m", "--mode", choices=["table", "rho"], default="table",
+                        help="Collision search using a hash table or memory-light using Pollard's rho")
+    parser.add_argument("-r", "--repetitions", type=int, default=10, help="Number of searches per width")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the traced run measuring peak memory")
+    parser.add_argument("out_filename", help="Name of the CSV output file")
+
+    args = parser.parse_args()
+    run(args.prefix, args.message_length, args.bits, args.algorithm, args.mode, args.repetitions,
+        args.out_filename, not args.no_memory)
+
+
+if __name__ == "__main__":
+    main()
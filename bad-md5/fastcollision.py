@@ -0,0 +1,51 @@
+import hashlib
+
+from rho import ALPHABET, Collision, walkMessage
+
+# maps every alphabet character to its successor, the last one wraps around to the first
+SUCCESSOR = bytes(ALPHABET[(ALPHABET.index(c) + 1) % len(ALPHABET)] if c in ALPHABET else 0 for c in range(256))
+
+
+def fastCollision(prefix: str, message_length: int, bits: int = 32, algorithm: str = "md5") -> Collision:
+    """
+    Hash-table collision search on the first bits of a hash without per-candidate allocations.
+    Candidates are consecutive counters written in place into a reusable bytearray, the hash state of the
+    fixed prefix is computed once and copied, and the table stores integer hashes mapping to counters.
+    :param str prefix: Prefix for the message
+    :param int message_length: Length of the message following the prefix
+    :param int bits: Number of leading bits of the digest that have to collide
+    :param str algorithm: Name of the hashlib algorithm
+    :return: Found collision, the messages are the same as walkMessage(prefix, counter, message_length)
+    """
+    if message_length < 1:
+        raise ValueError("The message needs to be at least one character long")
+    prefix_state = hashlib.new(algorithm, prefix.encode())
+    if bits > 8 * prefix_state.digest_size:
+        raise ValueError(f"{algorithm} digests are shorter than {bits} bits")
+    digest_bytes = (bits + 7) // 8
+    shift = 8 * digest_bytes - bits
+    candidate = bytearray(ALPHABET[0:1] * message_length)
+    first = ALPHABET[0]
+    last = message_length - 1
+    hash_table = dict()
+
+    counter = 0
+    while True:
+        state = prefix_state.copy()
+        state.update(candidate)
+        value = int.from_bytes(state.digest()[:digest_bytes], 'big') >> shift
+
+        if (previous := hash_table.get(value)) is not None:
+            return Collision(walkMessage(prefix, counter, message_length),
+                             walkMessage(prefix, previous, message_length), counter)
+        hash_table[value] = counter
+        counter += 1
+
+        # increments the candidate like an odometer, carrying over whenever a character wraps around
+        i = last
+        while (c := SUCCESSOR[candidate[i]]) == first:
+            candidate[i] = c
+            i -= 1
+            if i < 0:
+                raise ValueError(f"All candidates of length {message_length} have been exhausted")
+        candidate[i] = c
@@ -0,0 +1,190 @@
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+import hashlib
+import os
+import string
+
+ALPHABET = (string.ascii_letters + string.digits).encode()
+
+
+@dataclass(frozen=True, slots=True)
+class Collision:
+    first: str
+    second: str
+    iterations: int
+
+
+def truncatedHash(data: bytes, bits: int, algorithm: str = "md5") -> int:
+    """
+    Calculates the hash of the given bytes and returns its first bits as integer
+    :param bytes data: Input bytes
+    :param int bits: Number of leading bits of the digest to keep
+    :param str algorithm: Name of the hashlib algorithm
+    :return: Truncated hash value
+    """
+    digest = hashlib.new(algorithm, data).digest()
+    return int.from_bytes(digest, 'big') >> (8 * len(digest) - bits)
+
+
+def walkMessage(prefix: str, value: int, length: int) -> str:
+    """
+    Maps a hash value injectively to a message of the form prefix + length alphanumeric characters
+    :param str prefix: String prefix for the message
+    :param int value: Hash value that selects the message
+    :param int length: Number of characters following the prefix
+    :return: Generated message
+    """
+    characters = bytearray(ALPHABET[0:1] * length)
+    for i in range(length - 1, -1, -1):
+        if not value:
+            break
+        value, digit = divmod(value, len(ALPHABET))
+        characters[i] = ALPHABET[digit]
+    return prefix + characters.decode()
+
+
+class RhoSearch:
+    """
+    Memory-light collision search on a truncated hash (MD5 by default) using Pollard's rho with distinguished points.
+    Every walk iterates f(x) = H(prefix + encode(x)) from a start derived from the prefix and only its
+    distinguished endpoint (lowest bits zero) is stored.
+    """
+
+    def __init__(self, prefix: str, message_length: int, bits: int = 32, distinguished_bits: int | None = None,
+                 algorithm: str = "md5"):
+        if len(ALPHABET) ** message_length < 2 ** bits:
+            raise ValueError(f"A message length of {message_length} cannot encode {bits} bit hash values")
+        self.prefix = prefix
+        self.message_length = message_length
+        self.bits = bits
+        self.algorithm = algorithm
+        self.distinguished_bits = bits // 4 if distinguished_bits is None else distinguished_bits
+        self.distinguished_mask = (1 << self.distinguished_bits) - 1
+        # walks that did not hit a distinguished point after this many steps are most likely stuck in a cycle
+        self.max_walk_length = 20 << self.distinguished_bits
+
+    def message(self, value: int) -> str:
+        return walkMessage(self.prefix, value, self.message_length)
+
+    def step(self, value: int) -> int:
+        return truncatedHash(self.message(value).encode(), self.bits, self.algorithm)
+
+    def start(self, walk: int) -> int:
+        """
+        Derives the start of a walk deterministically from the prefix
+        :param int walk: Index of the walk
+        :return: Start value of the walk
+        """
+        return truncatedHash(f"{self.prefix}:{walk}".encode(), self.bits, self.algorithm)
+
+    def walk(self, walk: int) -> tuple[int, int, int] | None:
+        """
+        Iterates a single walk until it reaches a distinguished point
+        :param int walk: Index of the walk
+        :return: Tuple of (distinguished point, start value, walk length) or None if the walk was abandoned
+        """
+        start = value = self.start(walk)
+        for length in range(1, self.max_walk_length + 1):
+            value = self.step(value)
+            if value & self.distinguished_mask == 0:
+                return value, start, length
+        return None
+
+    def locate(self, first: tuple[int, int], second: tuple[int, int]) -> tuple[int, int, int] | None:
+        """
+        Retraces two walks ending in the same distinguished point to find the colliding inputs
+        :param first: Tuple of (start value, walk length) of the first walk
+        :param second: Tuple of (start value, walk length) of the second walk
+        :return: Tuple of (first input, second input, steps) or None if one walk started on the other one
+        """
+        (a, length_a), (b, length_b) = sorted([first, second], key=lambda walk: walk[1], reverse=True)
+        steps = length_a - length_b
+        for _ in range(steps):
+            a = self.step(a)
+
+        while a != b:
+            next_a, next_b = self.step(a), self.step(b)
+            steps += 2
+            if next_a == next_b:
+                return a, b, steps
+            a, b = next_a, next_b
+        return None
+
+    def walks(self, first_walk: int, count: int) -> tuple[list[tuple[int, int, int]], int]:
+        """
+        Runs a batch of consecutive walks
+        :param int first_walk: Index of the first walk of the batch
+        :param int count: Number of walks in the batch
+        :return: Tuple of (distinguished points found, number of iterations)
+        """
+        points = []
+        iterations = 0
+        for walk in range(first_walk, first_walk + count):
+            if (result := self.walk(walk)) is None:
+                iterations += self.max_walk_length
+            else:
+                points.append(result)
+                iterations += result[2]
+        return points, iterations
+
+    def parallelSearch(self, processes: int | None = None, batch_size: int = 64) -> Collision:
+        """
+        Spreads batches of walks across a process pool and merges their distinguished points into a
+        single table until two walks share an endpoint
+        :param processes: Number of worker processes, defaults to the number of CPUs
+        :param int batch_size: Number of walks per submitted batch
+        :return: First found collision
+        """
+        endpoints = dict()
+        iterations = 0
+        next_walk = 0
+        processes = processes or os.cpu_count() or 1
+
+        with ProcessPoolExecutor(processes) as executor:
+            pending = set()
+            for _ in range(2 * processes):
+                pending.add(executor.submit(self.walks, next_walk, batch_size))
+                next_walk += batch_size
+
+            while True:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    points, batch_iterations = future.result()
+                    iterations += batch_iterations
+                    for point, start, length in points:
+                        if point not in endpoints:
+                            endpoints[point] = (start, length)
+                        elif (found := self.locate(endpoints[point], (start, length))) is not None:
+                            executor.shutdown(wait=False, cancel_futures=True)
+                            a, b, steps = found
+                            return Collision(self.message(a), self.message(b), iterations + steps)
+
+                    pending.add(executor.submit(self.walks, next_walk, batch_size))
+                    next_walk += batch_size
+
+    def search(self, first_walk: int = 0) -> Collision:
+        """
+        Runs walks until two of them share a distinguished point and retraces them to the collision
+        :param int first_walk: Index of the first walk to run
+        :return: Found collision
+        """
+        endpoints = dict()
+        iterations = 0
+        walk = first_walk
+
+        while True:
+            result = self.walk(walk)
+            walk += 1
+            if result is None:
+                iterations += self.max_walk_length
+                continue
+
+            point, start, length = result
+            iterations += length
+            if point not in endpoints:
+                endpoints[point] = (start, length)
+                continue
+
+            if (found := self.locate(endpoints[point], (start, length))) is not None:
+                a, b, steps = found
+                return Collision(self.message(a), self.message(b), iterations + steps)
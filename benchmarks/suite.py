@@ -0,0 +1,616 @@
+import argparse
+import cProfile
+import gc
+import importlib
+import importlib.util
+import json
+import os
+import platform
+import random
+import statistics
+import string
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+from dataclasses import dataclass
+from hashlib import sha256
+from pathlib import Path
+from typing import Callable
+
+ROOT = Path(__file__).resolve().parent.parent
+BASELINE = Path(__file__).with_name("baseline.json")
+SIZES = ["small", "medium", "large"]
+SEED = "cipher-circus"
+# Relative slowdown against the baseline that is reported as regression
+THRESHOLD = 0.25
+# A workload is only a regression if it is also slower by this multiple of its noise, see compare
+NOISE_FACTOR = 2
+# The noise band never exceeds this multiple of the threshold, so that noisy workloads are still compared
+MAX_BAND_FACTOR = 2
+# Times a regression is measured again before it counts, the machine may have been slower for the whole run
+CONFIRMATIONS = 2
+# Compared time of every result section
+FIELDS = {"imports": "import_seconds", "workloads": "best"}
+
+# Directory put on sys.path and modules imported per tool. The tools import their siblings by name, montgomery is
+# a package imported from the repository root like fermat does.
+TOOLS = {
+    "montgomery": ("", ["montgomery.montgomery_ladder", "montgomery.multiexp", "montgomery.factorization"]),
+    "fermat": ("fermat", ["fermat"]),
+    "ecdsa": ("ecdsa", ["keys", "asn1parse", "noncescan"]),
+    "elliptic-curve-points": ("elliptic-curve-points", ["dlog"]),
+    "rsa-oaep": ("rsa-oaep", ["decrypt"]),
+    "bad-md5": ("bad-md5", ["fastcollision", "rho"]),
+    "authentication": ("authentication", ["authentication", "wordhash", "stream", "forge"]),
+    "histogram": ("histogram", ["create_histogram"]),
+    "feistel-network": ("feistel-network", ["schiffy"]),
+}
+
+
+@dataclass(frozen=True, slots=True)
+class Workload:
+    tool: str
+    name: str
+    # setup(scale, rng, workdir) prepares the inputs of the size and returns the measured callable
+    setup: Callable[[int, random.Random, Path], Callable[[], object]]
+
+    @property
+    def key(self) -> str:
+        return f"{self.tool}.{self.name}"
+
+
+WORKLOADS: list[Workload] = []
+
+
+def workload(tool: str, name: str):
+    """
+    Registers the decorated setup function as workload of a tool
+    """
+    def register(setup):
+        WORKLOADS.append(Workload(tool, name, setup))
+        return setup
+    return register
+
+
+def load(tool: str, module: str):
+    """
+    Imports a module of a tool with the directory of the tool on sys.path, the way it is imported when the tool
+    is run from its directory
+    :raises ImportError: if the tool needs a package that is not installed
+    """
+    directory = str(ROOT / TOOLS[tool][0])
+    if directory not in sys.path:
+        sys.path.insert(0, directory)
+    return importlib.import_module(module)
+
+
+def randomPrime(rng: random.Random, bits: int) -> int:
+    isProbablePrime = load("montgomery", "montgomery.factorization").isProbablePrime
+    while not isProbablePrime(p := rng.getrandbits(bits) | (1 << (bits - 1)) | 1):
+        pass
+    return p
+
+
+@workload("montgomery", "ladder")
+def montgomeryLadder(scale: int, rng: random.Random, workdir: Path):
+    ladder = load("montgomery", "montgomery.montgomery_ladder").ladder
+    bits = (512, 1024, 2048)[scale]
+    N = rng.getrandbits(bits) | (1 << (bits - 1)) | 1
+    powers = [(rng.randrange(2, N), rng.getrandbits(bits)) for _ in range(64)]
+    return lambda: [ladder(a, x, N) for a, x in powers]
+
+
+@workload("montgomery", "multiexp")
+def montgomeryMultiExp(scale: int, rng: random.Random, workdir: Path):
+    batchMultiExp = load("montgomery", "montgomery.multiexp").batchMultiExp
+    bits = (512, 1024, 2048)[scale]
+    N = rng.getrandbits(bits) | (1 << (bits - 1)) | 1
+    bases = [rng.randrange(2, N) for _ in range(2)]
+    tuples = [[rng.getrandbits(bits) for _ in bases] for _ in range(96)]
+    return lambda: batchMultiExp(bases, tuples, N)
+
+
+@workload("montgomery", "factorize")
+def montgomeryFactorize(scale: int, rng: random.Random, workdir: Path):
+    factorize = load("montgomery", "montgomery.factorization").factorize
+    bits = (24, 32, 40)[scale]
+    numbers = [randomPrime(rng, bits) * randomPrime(rng, bits) for _ in range(4)]
+    return lambda: [factorize(n) for n in numbers]
+
+
+@workload("montgomery", "batchgcd")
+def montgomeryBatchGCD(scale: int, rng: random.Random, workdir: Path):
+    batchGCD = load("montgomery", "montgomery.factorization").batchGCD
+    moduli = [rng.getrandbits(1024) | 1 for _ in range((256, 1024, 4096)[scale])]
+    return lambda: batchGCD(moduli)
+
+
+@workload("fermat", "fermat")
+def fermatTest(scale: int, rng: random.Random, workdir: Path):
+    fermat = load("fermat", "fermat").fermat
+    p = (100003, 300007, 1000003)[scale]
+    return lambda: fermat(p)
+
+
+@workload("ecdsa", "sign")
+def ecdsaSign(scale: int, rng: random.Random, workdir: Path):
+    keys = load("ecdsa", "keys")
+    key = keys.SigningKey(rng.randrange(1, keys.secp256r1.n))
+    messages = [rng.randbytes(64) for _ in range((32, 128, 512)[scale])]
+    return lambda: [key.sign(m) for m in messages]
+
+
+@workload("ecdsa", "verify")
+def ecdsaVerify(scale: int, rng: random.Random, workdir: Path):
+    keys = load("ecdsa", "keys")
+    key = keys.SigningKey(rng.randrange(1, keys.secp256r1.n))
+    messages = [rng.randbytes(64) for _ in range((12, 48, 192)[scale])]
+    signatures = [key.sign(m) for m in messages]
+    verifying_key = key.verifying_key
+    # the fixed-base table of the key is built once per key, not per verification
+    verifying_key.table
+    return lambda: [verifying_key.verify(s, m) for s, m in zip(signatures, messages)]
+
+
+@workload("ecdsa", "asn1")
+def ecdsaASN1(scale: int, rng: random.Random, workdir: Path):
+    encodeSignature = load("ecdsa", "keys").encodeSignature
+    iterTLVs = load("ecdsa", "asn1parse").iterTLVs
+    data = b"".join(encodeSignature(rng.getrandbits(256), rng.getrandbits(256))
+                    for _ in range((16_000, 64_000, 256_000)[scale]))
+    return lambda: [(int(tlv.get(0)), int(tlv.get(1))) for tlv in iterTLVs(data)]
+
+
+@workload("ecdsa", "noncescan")
+def ecdsaNonceScan(scale: int, rng: random.Random, workdir: Path):
+    encodeSignature = load("ecdsa", "keys").encodeSignature
+    NonceReuseScanner = load("ecdsa", "noncescan").NonceReuseScanner
+    pairs = [(f"message {i}", encodeSignature(rng.getrandbits(256), rng.getrandbits(256)))
+             for i in range((10_000, 40_000, 200_000)[scale])]
+    # one reused r in the middle of the corpus
+    r = rng.getrandbits(256)
+    pairs[len(pairs) // 3] = ("first", encodeSignature(r, rng.getrandbits(256)))
+    pairs[2 * len(pairs) // 3] = ("second", encodeSignature(r, rng.getrandbits(256)))
+    return lambda: NonceReuseScanner().scan(pairs)
+
+
+def curveGroup(scale: int, rng: random.Random):
+    """
+    Group generated by the first point of y^2 = x^3 + x + 679 over a prime p = 3 mod 4 and a random target
+    """
+    charg3 = load("elliptic-curve-points", "charg3")
+    dlog = load("elliptic-curve-points", "dlog")
+    p = (1000000007, 10000000019, 100000000003)[scale]
+    x = 0
+    while pow(rhs := (x ** 3 + x + 679) % p, (p - 1) // 2, p) != 1:
+        x += 1
+    group = dlog.CurveGroup(charg3.EllipticCurve(1, 679, p), charg3.Point(x, pow(rhs, (p + 1) // 4, p)))
+    return dlog, group, group.power(group.generator, rng.randrange(1, group.order))
+
+
+@workload("elliptic-curve-points", "bsgs")
+def curveBSGS(scale: int, rng: random.Random, workdir: Path):
+    dlog, group, target = curveGroup(scale, rng)
+    return lambda: dlog.discreteLog(group, target, "bsgs")
+
+
+@workload("elliptic-curve-points", "rho")
+def curveRho(scale: int, rng: random.Random, workdir: Path):
+    dlog, group, target = curveGroup(scale, rng)
+    return lambda: dlog.discreteLog(group, target, "rho")
+
+
+@workload("rsa-oaep", "decrypt")
+def rsaDecrypt(scale: int, rng: random.Random, workdir: Path):
+    decrypt = load("rsa-oaep", "decrypt")
+    oaep = decrypt.RSA_OAEP()
+    e = 65537
+    while True:
+        p, q = randomPrime(rng, 1024), randomPrime(rng, 1024)
+        if (p * q).bit_length() == 2048 and (p - 1) % e and (q - 1) % e:
+            break
+    key = decrypt.RSA_PrivateKey(p * q, pow(e, -1, (p - 1) * (q - 1)))
+    length = 256
+
+    def encrypt(message: bytes) -> bytes:
+        # OAEP encoding as decrypt.py expects it: 0x00 || masked seed || masked sha256(M) || PS || 0x01 || M
+        db = sha256(message).digest() + bytes(length - oaep.SEED_LENGTH - 1 - 32 - 1 - len(message)) + b"\x01" \
+            + message
+        while True:
+            seed = rng.randbytes(oaep.SEED_LENGTH)
+            masked_db = bytes(a ^ b for a, b in zip(db, oaep.mgf_1_sha256(seed, len(db))))
+            # decrypt.py handles the masked values as integers, leading zero bytes would be lost
+            if masked_db[0] and seed[0]:
+                break
+        masked_seed = bytes(a ^ b for a, b in zip(seed, oaep.mgf_1_sha256(masked_db, oaep.SEED_LENGTH)))
+        em = int.from_bytes(b"\x00" + masked_seed + masked_db, 'big')
+        return pow(em, e, key.n).to_bytes(length, 'big')
+
+    messages = []
+    while len(messages) < (4, 16, 64)[scale]:
+        message = f"message {len(messages)} {rng.random()}".encode()
+        if sha256(message).digest()[0]:
+            messages.append(message)
+    ciphertexts = [encrypt(m) for m in messages]
+    return lambda: [oaep.decrypt(key, c, b"", decode=False) for c in ciphertexts]
+
+
+@workload("bad-md5", "table")
+def md5Table(scale: int, rng: random.Random, workdir: Path):
+    fastCollision = load("bad-md5", "fastcollision").fastCollision
+    bits = (32, 34, 36)[scale]
+    return lambda: fastCollision("suite:", 16, bits)
+
+
+@workload("bad-md5", "rho")
+def md5Rho(scale: int, rng: random.Random, workdir: Path):
+    RhoSearch = load("bad-md5", "rho").RhoSearch
+    bits = (28, 32, 36)[scale]
+    return lambda: RhoSearch("suite:", 16, bits).search()
+
+
+@workload("authentication", "hexstring")
+def authenticationHexString(scale: int, rng: random.Random, workdir: Path):
+    authentication = load("authentication", "authentication")
+    auth = authentication.Authentication()
+    messages = [authentication.HexString(rng.randbytes(rng.randrange(1, 120)).hex())
+                for _ in range((1024, 4096, 16384)[scale])]
+
+    def run():
+        for message in messages:
+            auth.reset()
+            auth.H(message)
+    return run
+
+
+@workload("authentication", "wordhash")
+def authenticationWordHash(scale: int, rng: random.Random, workdir: Path):
+    H = load("authentication", "wordhash").H
+    data = rng.randbytes((1 << 20, 1 << 22, 1 << 24)[scale])
+    return lambda: H(data)
+
+
+@workload("authentication", "stream")
+def authenticationStream(scale: int, rng: random.Random, workdir: Path):
+    AuthenticationHash = load("authentication", "stream").AuthenticationHash
+    data = memoryview(rng.randbytes((1 << 20, 1 << 22, 1 << 24)[scale]))
+
+    def run():
+        h = AuthenticationHash()
+        # odd chunk size, so most chunks end in an incomplete word
+        for i in range(0, len(data), 4099):
+            h.update(data[i:i + 4099])
+        return h.intdigest()
+    return run
+
+
+@workload("authentication", "forge")
+def authenticationForge(scale: int, rng: random.Random, workdir: Path):
+    forge = load("authentication", "forge").forge
+    alphabet = string.ascii_letters + string.digits
+    suffixes = sorted("".join(rng.choices(alphabet, k=rng.randrange(4, 17))).encode()
+                      for _ in range((8192, 32768, 131072)[scale]))
+    return lambda: list(forge(b"abcd", 0x632e4e5c, suffixes))
+
+
+@workload("histogram", "count")
+def histogramCount(scale: int, rng: random.Random, workdir: Path):
+    countFile = load("histogram", "create_histogram").countFile
+    filename = workdir / "histogram.bin"
+    filename.write_bytes(rng.randbytes((1 << 25, 1 << 26, 1 << 27)[scale]))
+    return lambda: countFile(str(filename), 16)
+
+
+@workload("feistel-network", "ecb")
+def schiffyECB(scale: int, rng: random.Random, workdir: Path):
+    Schiffy = load("feistel-network", "schiffy").Schiffy
+    cipher = Schiffy(rng.getrandbits(128))
+    data = rng.randbytes((1 << 21, 1 << 23, 1 << 25)[scale])
+    return lambda: cipher.encryptECB(data)
+
+
+@workload("feistel-network", "ctr")
+def schiffyCTR(scale: int, rng: random.Random, workdir: Path):
+    Schiffy = load("feistel-network", "schiffy").Schiffy
+    cipher = Schiffy(rng.getrandbits(128))
+    data = rng.randbytes((1 << 21, 1 << 23, 1 << 25)[scale])
+    return lambda: cipher.ctr(data, 7)
+
+
+def calibrate(repeat: int) -> float:
+    """
+    Best time of a fixed pure Python loop of integer arithmetic, a measure of the speed of the machine at the time
+    of the run that the comparison divides out
+    """
+    def loop():
+        x = 1
+        for i in range(1_000_000):
+            x = (x * 31 + i) & 0xFFFFFFFF
+        return x
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        loop()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def noise(bests: list[float]) -> float:
+    """
+    Relative distance between the two fastest of the best times of separate passes, how much the best time of the
+    run depends on a single pass that was spared other load on the machine. Repeats within a pass follow each other
+    too closely to show that, and slower passes do not affect the best time. 0 with a single pass.
+    """
+    if len(bests) < 2:
+        return 0.0
+    first, second = sorted(bests)[:2]
+    return second / first - 1
+
+
+def importTimes(tool: str, repeat: int) -> tuple[list[float], list[float]]:
+    """
+    Imports the modules of a tool in fresh interpreters
+    :return: times of the imports alone and of the whole processes including interpreter startup
+    :raises ImportError: with the last line of the error output if the tool cannot be imported
+    """
+    directory, modules = TOOLS[tool]
+    code = "import importlib, time\nstart = time.perf_counter()\n" + \
+           "".join(f"importlib.import_module({module!r})\n" for module in modules) + \
+           "print(time.perf_counter() - start)"
+    env = os.environ | {"PYTHONPATH": str(ROOT)}
+    imports, startups = [], []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, "-c", code], cwd=ROOT / directory, env=env, capture_output=True,
+                                text=True)
+        startups.append(time.perf_counter() - start)
+        if result.returncode:
+            raise ImportError(result.stderr.strip().splitlines()[-1])
+        imports.append(float(result.stdout))
+    return imports, startups
+
+
+def timeRuns(run: Callable[[], object], repeat: int) -> list[float]:
+    """
+    Times repeated runs with the garbage collector off, like timeit does
+    """
+    timings = []
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            run()
+            timings.append(time.perf_counter() - start)
+    finally:
+        gc.enable()
+    return timings
+
+
+def peakMemory(run: Callable[[], object]) -> int:
+    """
+    Peak traced memory of one run in bytes. Separate from the timed runs, so that tracing does not distort them.
+    """
+    tracemalloc.start()
+    try:
+        run()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def profile(run: Callable[[], object], path: Path, profiler: str):
+    """
+    Writes a profile of one run
+    :param path: file name without suffix, .prof for cProfile and .html for pyinstrument is added
+    :param profiler: "cprofile" or "pyinstrument"
+    """
+    if profiler == "pyinstrument":
+        from pyinstrument import Profiler
+        profile = Profiler()
+        profile.start()
+        run()
+        profile.stop()
+        path.with_suffix(".html").write_text(profile.output_html())
+    else:
+        profile = cProfile.Profile()
+        profile.runcall(run)
+        profile.dump_stats(path.with_suffix(".prof"))
+
+
+def run(tools: list[str], size: str, repeat: int, passes: int, profile_dir: Path | None = None,
+        profiler: str = "cprofile", only: set[str] | None = None) -> dict:
+    """
+    Measures the imports and all workloads of the given tools and prints one line per result. The inputs of all
+    workloads are set up and run once untimed to fill the caches of the tools. Then every pass times the calibration
+    loop, the imports and the workloads in turn, so that a slower period of the machine hits all of them alike
+    instead of a few workloads. Output of the tools is discarded.
+    :param tools: tools to measure
+    :param size: size of the workloads
+    :param repeat: timed runs per workload and import in every pass
+    :param passes: passes over all imports and workloads
+    :param profile_dir: directory for profiles of one more run, no profiling if not given
+    :param profiler: "cprofile" or "pyinstrument"
+    :param only: names of the imports and workloads to measure, all of the tools if not given
+    :return: results as written to the JSON file, the median and best time of every import and workload over all
+        passes with the noise of the passes and the peak memory of the workloads, or why it was skipped
+    """
+    results = {"size": size, "repeat": repeat, "passes": passes, "python": platform.python_version(),
+               "platform": platform.platform(), "imports": {}, "workloads": {}}
+    calibrations = []
+    imports = {tool: ([], [], []) for tool in tools if only is None or tool in only}
+    workloads = {}
+
+    with tempfile.TemporaryDirectory() as workdir, open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+        for job in WORKLOADS:
+            if job.tool in tools and (only is None or job.key in only):
+                try:
+                    workloads[job.key] = job.setup(SIZES.index(size), random.Random(f"{SEED}:{job.key}"),
+                                                   Path(workdir))
+                except ImportError as error:
+                    results["workloads"][job.key] = {"skipped": f"{type(error).__name__}: {error}"}
+                    continue
+                workloads[job.key]()
+        timings = {key: ([], []) for key in workloads}
+
+        for _ in range(passes):
+            calibrations.append(calibrate(repeat))
+            for tool, (times, startups, bests) in imports.items():
+                if tool in results["imports"]:
+                    continue
+                try:
+                    passImports, passStartups = importTimes(tool, repeat)
+                except ImportError as error:
+                    results["imports"][tool] = {"skipped": str(error)}
+                    continue
+                times += passImports
+                startups += passStartups
+                bests.append(min(passImports))
+            for key, workload in workloads.items():
+                times, bests = timings[key]
+                times += timeRuns(workload, repeat)
+                bests.append(min(times[-repeat:]))
+
+        for key, workload in workloads.items():
+            times, bests = timings[key]
+            results["workloads"][key] = {"seconds": statistics.median(times), "best": min(times),
+                                         "noise": noise(bests), "peak_bytes": peakMemory(workload)}
+            if profile_dir is not None:
+                profile(workload, profile_dir / key, profiler)
+
+    results["calibration_seconds"] = min(calibrations)
+    results["workloads"] = {job.key: results["workloads"][job.key] for job in WORKLOADS
+                            if job.key in results["workloads"]}
+    for tool, (times, startups, bests) in imports.items():
+        if tool not in results["imports"]:
+            results["imports"][tool] = {"import_seconds": min(times), "startup_seconds": min(startups),
+                                        "noise": noise(bests)}
+        print(f"{tool:<34} {summary(results['imports'][tool], 'import_seconds')}")
+    for key, result in results["workloads"].items():
+        print(f"{key:<34} {summary(result, 'seconds')}")
+    return results
+
+
+def summary(result: dict, field: str) -> str:
+    if "skipped" in result:
+        return f"skipped, {result['skipped']}"
+    line = f"{result[field]:10.4f}s"
+    if "peak_bytes" in result:
+        line += f" {result['peak_bytes'] / 1024:12.1f} KiB peak"
+    return line
+
+
+def merge(results: dict, again: dict):
+    """
+    Keeps the faster of two measurements of every import and workload, so that the best time is taken over the
+    passes of both runs
+    :param results: results that are updated in place
+    :param again: results of measuring some of them again
+    """
+    results["calibration_seconds"] = min(results["calibration_seconds"], again["calibration_seconds"])
+    for section, field in FIELDS.items():
+        for name, result in again[section].items():
+            if "skipped" not in result and result[field] < results[section][name][field]:
+                results[section][name] = result
+
+
+def compare(results: dict, baseline: dict, threshold: float = THRESHOLD) -> list[str]:
+    """
+    Prints the change of every import and workload time and peak memory against the baseline. Workloads are
+    compared by their best time, which is less affected by other load on the machine than the median, and times
+    are relative to the calibration loop of their run, so that a baseline from another machine stays usable.
+    A slowdown is a regression if it exceeds the noise band, NOISE_FACTOR times the larger noise of the two runs,
+    but at least the threshold and at most MAX_BAND_FACTOR times it, so that a workload that varies on the machine
+    does not fail the comparison but a large slowdown of it still does.
+    :param results: results of this run
+    :param baseline: results of an earlier run of the same size
+    :param threshold: least relative slowdown that counts as regression
+    :return: names of the regressed imports and workloads
+    """
+    if results["size"] != baseline["size"]:
+        raise ValueError(f"Baseline is of size {baseline['size']}, not {results['size']}")
+
+    speed = results["calibration_seconds"] / baseline["calibration_seconds"]
+    print(f"\nCalibration loop {speed - 1:+.1%} against the baseline, times below are scaled to the baseline machine")
+    print(f"{'':<34} {'baseline':>10} {'current':>10} {'time':>8} {'band':>7} {'memory':>8}")
+    regressions = []
+    for section, field in FIELDS.items():
+        for name, current in results[section].items():
+            previous = baseline[section].get(name)
+            if previous is None or "skipped" in previous or "skipped" in current:
+                print(f"{name:<34} {'-' if previous is None else summary(previous, field)}")
+                continue
+            scaled = current[field] / speed
+            change = scaled / previous[field] - 1
+            band = min(max(threshold, NOISE_FACTOR * max(previous["noise"], current["noise"])),
+                       MAX_BAND_FACTOR * threshold)
+            line = f"{name:<34} {previous[field]:10.4f} {scaled:10.4f} {change:+8.1%} {band:7.0%}"
+            if "peak_bytes" in current:
+                line += f" {current['peak_bytes'] / max(previous['peak_bytes'], 1) - 1:+8.1%}"
+            if change > band:
+                regressions.append(name)
+                line += "  regression"
+            print(line)
+    return regressions
+
+
+def main():
+    """
+    Main method that parses the command line arguments, runs the benchmarks and compares them to a baseline
+    """
+    parser = argparse.ArgumentParser(description="Benchmarks the Python tools with fixed-seed workloads")
+    parser.add_argument("-s", "--size", choices=SIZES, default="small", help="Size of the workloads")
+    parser.add_argument("-t", "--tools", nargs="+", choices=list(TOOLS), default=list(TOOLS),
+                        help="Tools to benchmark")
+    parser.add_argument("-r", "--repeat", type=int, default=3, help="Timed runs per workload and import in a pass")
+    parser.add_argument("-n", "--passes", type=int, default=5,
+                        help="Passes over all workloads, the best time is taken over all of them")
+    parser.add_argument("-o", "--output", help="JSON file for the results, e.g. benchmarks/baseline.json")
+    parser.add_argument("-c", "--compare", nargs="?", const=str(BASELINE), metavar="BASELINE",
+                        help=f"Compares the results to a JSON file, defaults to {BASELINE.relative_to(ROOT)}")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD,
+                        help="Least relative slowdown reported as regression, the exit status is 1 if there is one")
+    parser.add_argument("-p", "--profile", metavar="DIR", help="Writes a profile of every workload to DIR")
+    parser.add_argument("--profiler", choices=["cprofile", "pyinstrument"], default="cprofile",
+                        help="cProfile .prof files for snakeviz/pstats or pyinstrument HTML reports")
+
+    args = parser.parse_args()
+    if args.repeat < 1 or args.passes < 1:
+        parser.error("--repeat and --passes need to be at least 1")
+    if args.profiler == "pyinstrument" and importlib.util.find_spec("pyinstrument") is None:
+        parser.error("pyinstrument is not installed")
+    profile_dir = None
+    if args.profile:
+        profile_dir = Path(args.profile)
+        profile_dir.mkdir(parents=True, exist_ok=True)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline["size"] != args.size:
+            parser.error(f"{args.compare} is a baseline of size {baseline['size']}, not {args.size}")
+
+    results = run(args.tools, args.size, args.repeat, args.passes, profile_dir, args.profiler)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+    if args.compare:
+        regressions = compare(results, baseline, args.threshold)
+        for _ in range(CONFIRMATIONS):
+            if not regressions:
+                break
+            print(f"\nMeasuring {', '.join(regressions)} again, a slowdown only counts if it persists")
+            merge(results, run(args.tools, args.size, args.repeat, args.passes, only=set(regressions)))
+            regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regressions: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,19 @@
+import mmap
 from abc import ABC, abstractmethod
+from base64 import b64decode
+from typing import Iterator
+
+
+def encodeLength(length: int) -> bytes:
+    """
+    Encodes a length in DER, using the short form below 128 and the long form otherwise
+    :param length: length of the content in bytes
+    :return: encoded length
+    """
+    if length < 0x80:
+        return length.to_bytes(1, 'big')
+    body = length.to_bytes((length.bit_length() + 7) // 8, 'big')
+    return (0x80 | len(body)).to_bytes(1, 'big') + body
 
 
 class ASN1Object(ABC):
@@ -14,25 +29,40 @@ class ASN1Object(ABC):
     def __int__(self):
         pass
 
+    @classmethod
+    def fromContent(cls, content: memoryview, parser: "ASN1Parser") -> "ASN1Object":
+        """
+        Creates the object from the content octets of its TLV
+        :param content: view on the content octets
+        :param parser: parser used for nested content
+        """
+        return cls(content)
+
 
 class Sequence(ASN1Object):
+    tag = 0x30
+
     def __init__(self, content: list):
         self.content = content
 
+    @classmethod
+    def fromContent(cls, content: memoryview, parser: "ASN1Parser") -> "Sequence":
+        return cls(parser.parseContent(content))
+
     def __bytes__(self):
         output = b""
         for content in self.content:
             output += bytes(content)
-        return b"\x30" + (len(output)).to_bytes(1, 'big') + output
+        return self.tag.to_bytes(1, 'big') + encodeLength(len(output)) + output
 
     def __str__(self):
         content = ""
         for i in self.content:
             content += str(i) + ","
-        return f"Sequence({content[:-1]})"
+        return f"{type(self).__name__}({content[:-1]})"
 
     def __int__(self):
-        raise TypeError("Sequence cannot be converted to integer")
+        raise TypeError(f"{type(self).__name__} cannot be converted to integer")
 
     def get(self, index: int) -> ASN1Object | None:
         if index >= len(self.content):
@@ -40,8 +70,12 @@ class Sequence(ASN1Object):
         return self.content[index]
 
 
+class Set(Sequence):
+    tag = 0x31
+
+
 class Integer(ASN1Object):
-    def __init__(self, value: int | bytes):
+    def __init__(self, value: int | bytes | memoryview):
         if isinstance(value, int):
             self.value = value
         else:
@@ -53,7 +87,7 @@ class Integer(ASN1Object):
         # check if MSB set
         if self.value >> byte_length * 8 == 1:
             byte_length += 1
-        return b"\x02" + byte_length.to_bytes(1, byteorder='big') + self.value.to_bytes(byte_length, 'big')
+        return b"\x02" + encodeLength(byte_length) + self.value.to_bytes(byte_length, 'big')
 
     def __str__(self):
         return f"Integer({self.value})"
@@ -67,6 +101,135 @@ class Integer(ASN1Object):
         return self.value
 
 
+class OctetString(ASN1Object):
+    def __init__(self, value: bytes | memoryview):
+        self.value = value
+
+    def __bytes__(self):
+        return b"\x04" + encodeLength(len(self.value)) + bytes(self.value)
+
+    def __str__(self):
+        return f"OctetString({bytes(self.value).hex()})"
+
+    def __int__(self):
+        return int.from_bytes(self.value, "big")
+
+
+class BitString(ASN1Object):
+    def __init__(self, value: bytes | memoryview, unused_bits: int = 0):
+        self.value = value
+        self.unused_bits = unused_bits
+
+    @classmethod
+    def fromContent(cls, content: memoryview, parser: "ASN1Parser") -> "BitString":
+        if len(content) == 0:
+            raise ASN1ParseException("BIT STRING without unused bits octet")
+        return cls(content[1:], content[0])
+
+    def __bytes__(self):
+        return (b"\x03" + encodeLength(len(self.value) + 1) + self.unused_bits.to_bytes(1, 'big')
+                + bytes(self.value))
+
+    def __str__(self):
+        return f"BitString({bytes(self.value).hex()})"
+
+    def __int__(self):
+        return int.from_bytes(self.value, "big") >> self.unused_bits
+
+
+class Null(ASN1Object):
+    def __init__(self):
+        pass
+
+    @classmethod
+    def fromContent(cls, content: memoryview, parser: "ASN1Parser") -> "Null":
+        if len(content) != 0:
+            raise ASN1ParseException("NULL with content")
+        return cls()
+
+    def __bytes__(self):
+        return b"\x05\x00"
+
+    def __str__(self):
+        return "Null()"
+
+    def __int__(self):
+        raise TypeError("Null cannot be converted to integer")
+
+
+class ObjectIdentifier(ASN1Object):
+    def __init__(self, value: str | bytes | memoryview):
+        if isinstance(value, str):
+            self.value = value
+            return
+
+        arcs = []
+        arc = 0
+        for byte in value:
+            arc = (arc << 7) | (byte & 0x7f)
+            if not byte & 0x80:
+                arcs.append(arc)
+                arc = 0
+        if not arcs:
+            raise ASN1ParseException("Empty OBJECT IDENTIFIER")
+        first = min(arcs[0] // 40, 2)
+        self.value = ".".join(str(arc) for arc in [first, arcs[0] - 40 * first] + arcs[1:])
+
+    def __bytes__(self):
+        arcs = [int(arc) for arc in self.value.split(".")]
+        content = b""
+        for arc in [40 * arcs[0] + arcs[1]] + arcs[2:]:
+            encoded = [arc & 0x7f]
+            while arc := arc >> 7:
+                encoded.append(0x80 | (arc & 0x7f))
+            content += bytes(reversed(encoded))
+        return b"\x06" + encodeLength(len(content)) + content
+
+    def __str__(self):
+        return f"ObjectIdentifier({self.value})"
+
+    def __eq__(self, other):
+        if isinstance(other, ObjectIdentifier):
+            return self.value == other.value
+        if isinstance(other, str):
+            return self.value == other
+        raise TypeError(f"Cannot compare {type(self)} to {type(other)}")
+
+    def __int__(self):
+        raise TypeError("ObjectIdentifier cannot be converted to integer")
+
+
+class Tagged(ASN1Object):
+    """
+    Any other tag, e.g. context-specific tags or the string and time types of certificates.
+    Constructed tags hold their parsed content as list, primitive ones the content octets.
+    """
+
+    def __init__(self, tag: int, content: list | bytes | memoryview):
+        self.tag = tag
+        self.content = content
+
+    def __bytes__(self):
+        if isinstance(self.content, list):
+            output = b"".join(bytes(content) for content in self.content)
+        else:
+            output = bytes(self.content)
+        return self.tag.to_bytes(1, 'big') + encodeLength(len(output)) + output
+
+    def __str__(self):
+        if isinstance(self.content, list):
+            return f"Tagged({self.tag:#x}, {','.join(str(content) for content in self.content)})"
+        return f"Tagged({self.tag:#x}, {bytes(self.content).hex()})"
+
+    def __int__(self):
+        raise TypeError("Tagged cannot be converted to integer")
+
+    def get(self, index: int) -> ASN1Object | None:
+        if not isinstance(self.content, list) or index >= len(self.content):
+            return None
+        return self.content[index]
+
+
 class ASN1ParseException(Exception):
     def __init__(self, message):
         self.message = message
@@ -74,35 +237,214 @@ class ASN1ParseException(Exception):
 
 class ASN1Parser:
     """
-    Allows parsing of sequences and integers for any arbitrary depth
+    Allows parsing of DER/BER encoded data for any arbitrary depth. The input is accessed through a memoryview
+    with offsets, so no sub-slices are copied while descending.
     """
-    asn1_types = {"0x2": Integer, "0x30": Sequence}
-    tree = {}
+    asn1_types = {0x02: Integer, 0x03: BitString, 0x04: OctetString, 0x05: Null, 0x06: ObjectIdentifier,
+                  0x30: Sequence, 0x31: Set}
+
+    @staticmethod
+    def decodeHeader(buffer: memoryview, offset: int) -> tuple[int, int, int | None]:
+        """
+        Decodes tag and length of the TLV at the given offset
+        :param buffer: view on the input
+        :param offset: start of the TLV
+        :return: tuple of (tag, start of the content, end of the content or None for indefinite lengths)
+        """
+        if offset + 2 > len(buffer):
+            raise ASN1ParseException("Truncated ASN1 header")
+        tag = buffer[offset]
+        if tag & 0x1f == 0x1f:
+            raise ASN1ParseException("High tag numbers are not supported")
+
+        length = buffer[offset + 1]
+        offset += 2
+        if length == 0x80:
+            if not tag & 0x20:
+                raise ASN1ParseException("Indefinite length of a primitive type")
+            return tag, offset, None
+        if length & 0x80:
+            length_bytes = length & 0x7f
+            if offset + length_bytes > len(buffer):
+                raise ASN1ParseException("Truncated ASN1 length")
+            length = int.from_bytes(buffer[offset:offset + length_bytes], 'big')
+            offset += length_bytes
 
-    def parse(self, byte_input: bytes):
-        packed = False
-        current_index = 0
+        if offset + length > len(buffer):
+            raise ASN1ParseException("ASN1 length exceeds the input")
+        return tag, offset, offset + length
+
+    def decode(self, buffer: memoryview, offset: int = 0) -> tuple[ASN1Object, int]:
+        """
+        Decodes the TLV at the given offset
+        :param buffer: view on the input
+        :param offset: start of the TLV
+        :return: tuple of (decoded object, offset after the TLV)
+        """
+        tag, start, end = self.decodeHeader(buffer, offset)
+
+        if end is None:
+            # BER indefinite length, the content ends with an end-of-contents TLV (0x00 0x00)
+            content = []
+            while buffer[start:start + 2] != b"\x00\x00":
+                element, start = self.decode(buffer, start)
+                content.append(element)
+            end = start + 2
+            if current_type := self.asn1_types.get(tag):
+                if not issubclass(current_type, Sequence):
+                    raise ASN1ParseException(f"Indefinite length of type {current_type.__name__}")
+                return current_type(content), end
+            return Tagged(tag, content), end
+
+        if current_type := self.asn1_types.get(tag):
+            return current_type.fromContent(buffer[start:end], self), end
+        if tag & 0x20:
+            return Tagged(tag, self.parseContent(buffer[start:end])), end
+        return Tagged(tag, buffer[start:end]), end
+
+    def parseContent(self, buffer: memoryview) -> list:
+        """
+        Decodes all consecutive TLVs of the buffer
+        :param buffer: view on the input
+        :return: list of decoded objects
+        """
         content = []
-        while current_index < len(byte_input):
-            if not (current_type := self.asn1_types.get(hex(byte_input[current_index]))):
-                raise ASN1ParseException(f"Unknown ASN1 type found")
-            if current_type == Sequence and current_index == 0:
-                packed = True
-                current_index += 2
-            elif current_type == Sequence:
-                length = byte_input[current_index + 1]
-                current_index += 2
-                content.append(Sequence(self.parse(byte_input[current_index:current_index + length])))
-                current_index += length
-            else:
-                length = byte_input[current_index + 1]
-                current_index += 2
-                content.append(Integer(byte_input[current_index:current_index + length]))
-                current_index += length
-        if packed:
-            return Sequence(content)
-        else:
-            return content
+        offset = 0
+        while offset < len(buffer):
+            element, offset = self.decode(buffer, offset)
+            content.append(element)
+        return content
+
+    def parse(self, byte_input: bytes | memoryview):
+        """
+        Parses the given input
+        :param byte_input: DER/BER encoded data
+        :return: the sequence if the input is a single sequence, otherwise the list of decoded objects
+        """
+        content = self.parseContent(memoryview(byte_input))
+        if len(content) == 1 and isinstance(content[0], Sequence):
+            return content[0]
+        return content
+
+    def parsePEM(self, pem: str | bytes):
+        """
+        Parses the first block of PEM encoded data, e.g. public_key.pem or a certificate
+        :param pem: content of the PEM file
+        :return: same as parse
+        """
+        if isinstance(pem, bytes):
+            pem = pem.decode("ascii")
+        lines = pem.strip().splitlines()
+        begin = next(i for i, line in enumerate(lines) if line.startswith("-----BEGIN"))
+        end = next(i for i, line in enumerate(lines) if line.startswith("-----END") and i > begin)
+        return self.parse(b64decode("".join(lines[begin + 1:end])))
+
+
+def tlvBounds(buffer: memoryview, offset: int) -> tuple[int, int, int, int]:
+    """
+    Determines the bounds of the TLV at the given offset without decoding its content
+    :param buffer: view on the input
+    :param offset: start of the TLV
+    :return: tuple of (tag, start of the content, end of the content, offset after the TLV)
+    """
+    tag, start, end = ASN1Parser.decodeHeader(buffer, offset)
+    if end is not None:
+        return tag, start, end, end
+
+    # BER indefinite length, skip the nested TLVs until the end-of-contents TLV (0x00 0x00)
+    end = start
+    while buffer[end:end + 2] != b"\x00\x00":
+        if end + 2 > len(buffer):
+            raise ASN1ParseException("Missing end-of-contents of an indefinite length")
+        end = tlvBounds(buffer, end)[3]
+    return tag, start, end, end + 2
+
+
+class LazyTLV:
+    """
+    View on an encoded TLV that is only decoded on access. Integers are converted with int(), nested TLVs are
+    iterated or accessed with get() and the whole object is decoded with decode().
+    """
+    __slots__ = ["buffer", "offset", "tag", "start", "end", "next"]
+
+    def __init__(self, buffer: memoryview, offset: int):
+        self.buffer = buffer
+        self.offset = offset
+        self.tag, self.start, self.end, self.next = tlvBounds(buffer, offset)
+
+    @property
+    def content(self) -> memoryview:
+        return self.buffer[self.start:self.end]
+
+    def __bytes__(self):
+        return bytes(self.buffer[self.offset:self.next])
+
+    def __int__(self):
+        if self.tag != 0x02:
+            raise TypeError(f"TLV with tag {self.tag:#x} cannot be converted to integer")
+        return int.from_bytes(self.content, "big")
+
+    def __iter__(self) -> Iterator["LazyTLV"]:
+        if not self.tag & 0x20:
+            raise TypeError(f"TLV with tag {self.tag:#x} is not constructed")
+        offset = self.start
+        while offset < self.end:
+            element = LazyTLV(self.buffer, offset)
+            yield element
+            offset = element.next
+
+    def get(self, index: int) -> "LazyTLV | None":
+        for i, element in enumerate(self):
+            if i == index:
+                return element
+        return None
+
+    def __eq__(self, other):
+        if isinstance(other, (LazyTLV, ASN1Object)):
+            return bytes(self) == bytes(other)
+        return NotImplemented
+
+    def __str__(self):
+        return f"LazyTLV({self.tag:#x}, {self.next - self.offset} bytes)"
+
+    def decode(self) -> ASN1Object:
+        return ASN1Parser().decode(self.buffer, self.offset)[0]
+
+
+def iterTLVs(buffer: bytes | memoryview) -> Iterator[LazyTLV]:
+    """
+    Yields the concatenated top-level TLVs of the buffer one at a time
+    :param buffer: DER/BER encoded data
+    :return: iterator of lazy views
+    """
+    view = memoryview(buffer)
+    offset = 0
+    while offset < len(view):
+        element = LazyTLV(view, offset)
+        yield element
+        offset = element.next
+
+
+def iterFile(filename: str) -> Iterator[LazyTLV]:
+    """
+    Memory-maps a file of concatenated TLVs, e.g. DER signatures, and yields them one at a time.
+    The views are backed by the mapping and only valid until the iteration has finished.
+    :param filename: name of the file
+    :return: iterator of lazy views
+    """
+    with open(filename, "rb") as f:
+        try:
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty file
+            return
+    try:
+        yield from iterTLVs(mapping)
+    finally:
+        try:
+            mapping.close()
+        except BufferError:
+            # views handed out are still referenced, the mapping is closed once they are collected
+            pass
 
 
 # Some tests
@@ -121,3 +463,21 @@ if __name__ == "__main__":
     print(parser.parse(int3))
     print(parser.parse(int4))
     print(parser.parse(seq))
+
+    long_seq = bytes(Sequence([Integer(2 ** 1024), OctetString(bytes(300)), Null(), BitString(b"\x04\x01")]))
+    assert long_seq[:4] == b"\x30\x82\x01\xbb"
+    assert bytes(parser.parse(long_seq)) == long_seq
+    assert parser.parse(bytes(ObjectIdentifier("1.2.840.10045.3.1.7")))[0] == "1.2.840.10045.3.1.7"
+    assert bytes(ObjectIdentifier("1.2.840.10045.3.1.7")).hex() == "06082a8648ce3d030107"
+    assert str(parser.parse(b"\x30\x80\x02\x01\x01\x00\x00")) == "Sequence(Integer(1))"
+
+    with open("public_key.pem") as f:
+        public_key = parser.parsePEM(f.read())
+    print(public_key)
+    assert public_key.get(0).get(1) == "1.2.840.10045.3.1.7"
+
+    lazy = list(iterTLVs(seq + int4 + b"\x30\x80\x02\x01\x01\x00\x00"))
+    assert len(lazy) == 3 and bytes(lazy[0]) == seq
+    assert int(lazy[0].get(3)) == 128 and int(lazy[0].get(2).get(1).get(0)) == 22
+    assert int(lazy[2].get(0)) == 1
+    assert str(lazy[0].decode()) == str(parser.parse(seq))
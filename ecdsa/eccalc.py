@@ -1,5 +1,12 @@
+import sys
 from dataclasses import dataclass
-from logging import debug
+from pathlib import Path
+
+# montgomery is a package next to this directory, like fermat imports it when run from the repository root
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from montgomery import instrumentation
+from montgomery.instrumentation import instrumented
+
 
 def eea(a, b):
     if a == 0:
@@ -26,9 +33,13 @@ class FiniteField:
         return x % self.module
 
     def multiply(self, a, b):
+        if instrumentation.operations is not None:
+            instrumentation.operations["multiply"] += 1
         return (a * b) % self.module
 
     def inverse(self, x):
+        if instrumentation.operations is not None:
+            instrumentation.operations["inverse"] += 1
         gcd, _, inverse = eea(self.module, x)
 
         if gcd != 1:
@@ -36,6 +47,61 @@ class FiniteField:
 
         return inverse
 
+    def sqrt(self, x):
+        """
+        Square root modulo a prime: one exponentiation x^((p+1)/4) if p = 3 mod 4 (as for secp256r1),
+        Tonelli-Shanks otherwise
+        :return: one of the two roots, the other one is p - root
+        """
+        p = self.module
+        x %= p
+        if x == 0:
+            return 0
+        if p % 4 == 3:
+            root = pow(x, (p + 1) // 4, p)
+        else:
+            if pow(x, (p - 1) // 2, p) != 1:
+                raise ValueError(f'{x} is not a square')
+            # p - 1 = q * 2^s with q odd, z is any non-residue
+            q, s = p - 1, 0
+            while q % 2 == 0:
+                q, s = q // 2, s + 1
+            z = 2
+            while pow(z, (p - 1) // 2, p) != p - 1:
+                z += 1
+            c, root, t = pow(z, q, p), pow(x, (q + 1) // 2, p), pow(x, q, p)
+            while t != 1:
+                i, t2 = 0, t
+                while t2 != 1:
+                    t2, i = t2 * t2 % p, i + 1
+                b = pow(c, 1 << (s - i - 1), p)
+                s, c = i, b * b % p
+                root, t = root * b % p, t * c % p
+        if root * root % p != x:
+            raise ValueError(f'{x} is not a square')
+        return root
+
+
+def wnaf(n: int, width: int) -> list[int]:
+    """
+    Width-w non-adjacent form of n: odd digits in (-2^(w-1), 2^(w-1)), at most one in w consecutive ones is
+    non-zero
+    :param n: non-negative scalar
+    :param width: window width w >= 2
+    :return: digits, least significant first
+    """
+    digits = []
+    while n:
+        digit = 0
+        if n & 1:
+            digit = n & ((1 << width) - 1)
+            if digit >= 1 << (width - 1):
+                digit -= 1 << width
+            n -= digit
+        digits.append(digit)
+        n >>= 1
+    return digits
+
 
 @dataclass
 class Point:
@@ -67,6 +133,8 @@ class EllipticCurve:
             return Point(0, 0, True)
 
         elif p.x != q.x:
+            if instrumentation.operations is not None:
+                instrumentation.operations["add"] += 1
             dividor = self.field.add(q.x, -p.x)
             m = self.field.add(q.y, -p.y)
             m = self.field.multiply(m, self.field.inverse(dividor))
@@ -76,6 +144,8 @@ class EllipticCurve:
             return Point(u, self.field.reduce(-v))
 
         else:
+            if instrumentation.operations is not None:
+                instrumentation.operations["double"] += 1
             dividor = self.field.multiply(2, p.y)
             m = self.field.add(
                 self.field.multiply(3, self.field.multiply(p.x, p.x)), self.a
@@ -90,15 +160,108 @@ class EllipticCurve:
     def multiplyPoint(self, p: Point, n: int):
         h = p
         for i in range(n.bit_length() - 2, -1, -1):
-            debug(f"{i=}:\tadding {h} and {h}")
+            if instrumentation.tracer is not None:
+                instrumentation.tracer(f"{i=}:\tadding {h} and {h}")
             h = self.addPoint(h, h)
             if (n >> i) & 1:
-                debug(f"\t\tadding {h} and {p} because bit is set")
+                if instrumentation.tracer is not None:
+                    instrumentation.tracer(f"\t\tadding {h} and {p} because bit is set")
                 h = self.addPoint(h, p)
-            debug(f"\t\th_{i}={h}")
+            if instrumentation.tracer is not None:
+                instrumentation.tracer(f"\t\th_{i}={h}")
 
         return h
 
+    def negatePoint(self, p: Point) -> Point:
+        return p if p.infty else Point(p.x, self.field.reduce(-p.y))
+
+    def multiplyPointNAF(self, p: Point, n: int, width: int = 4) -> Point:
+        """
+        Multiplies a point using the width-w NAF of n, costs about n.bit_length() / (width + 1) additions
+        with a table of the 2^(width-2) odd multiples P, 3P, 5P, ...
+        """
+        double = self.addPoint(p, p)
+        table = [p]
+        for _ in range((1 << (width - 2)) - 1):
+            table.append(self.addPoint(table[-1], double))
+
+        h = Point(0, 0, True)
+        for digit in reversed(wnaf(n, width)):
+            h = self.addPoint(h, h)
+            if digit > 0:
+                h = self.addPoint(h, table[digit >> 1])
+            elif digit < 0:
+                h = self.addPoint(h, self.negatePoint(table[-digit >> 1]))
+        return h
+
+    def encodePoint(self, p: Point, compressed: bool = True) -> bytes:
+        """
+        SEC1 encoding: 0x02/0x03 (parity of y) and x, or 0x04, x and y; the point at infinity is 0x00
+        """
+        if p.infty:
+            return b"\x00"
+        size = (self.field.module.bit_length() + 7) // 8
+        if compressed:
+            return bytes([2 + (p.y & 1)]) + p.x.to_bytes(size, 'big')
+        return b"\x04" + p.x.to_bytes(size, 'big') + p.y.to_bytes(size, 'big')
+
+    def decodePoint(self, data: bytes) -> Point:
+        """
+        Decodes a compressed or uncompressed SEC1 point and checks that it lies on the curve. The right-hand
+        side x^3 + ax + b is computed once and either gives y as its square root or is compared to y^2,
+        so no separate hasPoint call is needed.
+        """
+        if data[:1] == b"\x00" and len(data) == 1:
+            return Point(0, 0, True)
+        p = self.field.module
+        size = (p.bit_length() + 7) // 8
+        if not data or data[0] not in (2, 3, 4) or len(data) != 1 + size * (2 if data[0] == 4 else 1):
+            raise ValueError("Invalid SEC1 point encoding")
+
+        x = int.from_bytes(data[1:1 + size], 'big')
+        if x >= p:
+            raise ValueError("Coordinate exceeds the field")
+        rhs = (x * x * x + self.a * x + self.b) % p
+        if data[0] == 4:
+            y = int.from_bytes(data[1 + size:], 'big')
+            if y >= p or y * y % p != rhs:
+                raise ValueError("Point is not on the curve")
+            return Point(x, y)
+
+        try:
+            y = self.field.sqrt(rhs)
+        except ValueError:
+            raise ValueError("Point is not on the curve") from None
+        if y & 1 != data[0] & 1:
+            if y == 0:
+                # p - 0 is no coordinate, the only root 0 is even
+                raise ValueError("Invalid SEC1 point encoding")
+            y = p - y
+        return Point(x, y)
+
+    def encodePoints(self, points: list[Point], compressed: bool = True) -> bytes:
+        """
+        Concatenated SEC1 encodings of a list of points
+        """
+        return b"".join(self.encodePoint(p, compressed) for p in points)
+
+    def decodePoints(self, data: bytes) -> list[Point]:
+        """
+        Decodes concatenated SEC1 points, the length of each one follows from its prefix byte
+        """
+        size = (self.field.module.bit_length() + 7) // 8
+        lengths = {0: 1, 2: 1 + size, 3: 1 + size, 4: 1 + 2 * size}
+        view = memoryview(data)
+        points = []
+        offset = 0
+        while offset < len(view):
+            if view[offset] not in lengths:
+                raise ValueError(f"Invalid SEC1 point encoding at offset {offset}")
+            length = lengths[view[offset]]
+            points.append(self.decodePoint(bytes(view[offset:offset + length])))
+            offset += length
+        return points
+
 
 @dataclass(frozen=True, slots=True)
 class secp256r1(EllipticCurve):
@@ -1,15 +1,101 @@
+import hmac
+import mmap
+from functools import lru_cache
 from eccalc import secp256r1, FiniteField
 from asn1parse import ASN1Parser, Sequence, Integer
 from hashlib import sha256
+from typing import BinaryIO, Iterable
+
+CHUNK_SIZE = 1 << 20
+
+Message = str | bytes | BinaryIO | Iterable[bytes]
 
 
 class ECDSA:
     @staticmethod
-    def sign(d: int, m: str, k: int) -> Sequence:
+    def hash_message(m: Message) -> int:
+        """
+        Hashes a message with SHA-256. Strings are encoded in utf-8, file objects and iterables of bytes are
+        hashed chunk by chunk, so the message never has to be held in memory as a whole.
+        """
+        if isinstance(m, str):
+            m = bytes(m, 'utf-8')
+        h = sha256()
+        if isinstance(m, (bytes, bytearray, memoryview)):
+            h.update(m)
+        elif hasattr(m, 'read'):
+            while chunk := m.read(CHUNK_SIZE):
+                h.update(bytes(chunk, 'utf-8') if isinstance(chunk, str) else chunk)
+        else:
+            for chunk in m:
+                h.update(chunk)
+        return int.from_bytes(h.digest(), byteorder='big')
+
+    @staticmethod
+    def hash_file(filename: str, use_mmap: bool = False) -> int:
+        """
+        Hashes the content of a file in chunks or, with use_mmap, through a read-only memory mapping
+        """
+        with open(filename, 'rb') as f:
+            if not use_mmap:
+                return ECDSA.hash_message(f)
+            try:
+                mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:  # empty file
+                return ECDSA.hash_message(b"")
+            with mapping:
+                return int.from_bytes(sha256(mapping).digest(), byteorder='big')
+
+    @staticmethod
+    @lru_cache(maxsize=256)
+    def __rfc6979_key_setup(d: int) -> tuple[bytes, hmac.HMAC]:
+        """
+        Precomputes the per-key part of RFC 6979: the private key octets and the HMAC with the initial all-zero
+        key that has already absorbed V || 0x00 || int2octets(d)
+        """
+        x = d.to_bytes(32, byteorder='big')
+        return x, hmac.new(b"\x00" * 32, b"\x01" * 32 + b"\x00" + x, sha256)
+
+    @staticmethod
+    def rfc6979_nonce(d: int, e: int) -> int:
+        """
+        Derives the deterministic nonce of RFC 6979 (HMAC-SHA256) for the private key d and the message hash e
+        """
+        x, setup = ECDSA.__rfc6979_key_setup(d)
+        h1 = (e % secp256r1.n).to_bytes(32, byteorder='big')
+
+        k = setup.copy()
+        k.update(h1)
+        K = k.digest()
+        V = hmac.new(K, b"\x01" * 32, sha256).digest()
+        K = hmac.new(K, V + b"\x01" + x + h1, sha256).digest()
+        V = hmac.new(K, V, sha256).digest()
+
+        while True:
+            V = hmac.new(K, V, sha256).digest()
+            if 1 <= (nonce := int.from_bytes(V, byteorder='big')) < secp256r1.n:
+                return nonce
+            K = hmac.new(K, V + b"\x00", sha256).digest()
+            V = hmac.new(K, V, sha256).digest()
+
+    @staticmethod
+    def sign(d: int, m: Message, k: int | None = None) -> Sequence:
+        return ECDSA.sign_digest(d, ECDSA.hash_message(m), k)
+
+    @staticmethod
+    def sign_digest(d: int, e: int | bytes, k: int | None = None) -> Sequence:
+        """
+        Signs an already computed SHA-256 message hash, given as integer or digest bytes.
+        Without a nonce k, the deterministic nonce of RFC 6979 is used.
+        """
         curve = secp256r1()
         field = FiniteField(curve.n)
 
-        e = int.from_bytes(sha256(bytes(m, 'utf-8')).digest(), byteorder='big')
+        if isinstance(e, bytes):
+            e = int.from_bytes(e, byteorder='big')
+
+        if k is None:
+            k = ECDSA.rfc6979_nonce(d, e)
 
         R = curve.multiplyPoint(secp256r1.G, k)
 
@@ -19,12 +105,18 @@ class ECDSA:
         return Sequence([r, s])
 
     @staticmethod
-    def __calculate_nonce(seq1: Sequence, seq2: Sequence, m1: str, m2: str):
-        curve = secp256r1
-        field = FiniteField(curve.n)
+    def recover_private_key(r: int, s1: int, s2: int, e1: int, e2: int) -> int:
+        """
+        Recovers the private key from two signatures (r, s1) and (r, s2) of the message hashes e1 and e2
+        that were created with the same nonce
+        """
+        field = FiniteField(secp256r1.n)
+        return (s2 * e1 - s1 * e2) * field.inverse(s1 * r - s2 * r) % field.module
 
-        e1 = int.from_bytes(sha256(bytes(m1, 'utf-8')).digest(), byteorder='big')
-        e2 = int.from_bytes(sha256(bytes(m2, 'utf-8')).digest(), byteorder='big')
+    @staticmethod
+    def __calculate_nonce(seq1: Sequence, seq2: Sequence, m1: Message, m2: Message):
+        e1 = ECDSA.hash_message(m1)
+        e2 = ECDSA.hash_message(m2)
 
         if not seq1.get(0) == seq2.get(0):
             raise AttributeError("S1 and S2 are not equal, private key cannot be determined")
@@ -36,9 +128,7 @@ class ECDSA:
         s1 = int(seq1.get(1))
         s2 = int(seq2.get(1))
 
-        d = (s2 * e1 - s1 * e2) * field.inverse(s1 * r - s2 * r) % field.module
-
-        return d
+        return ECDSA.recover_private_key(r, s1, s2, e1, e2)
 
     @staticmethod
     def determine_nonce_reuse(seq1: bytes, seq2: bytes, m1=None, m2=None):
@@ -54,3 +144,21 @@ class ECDSA:
                 print(f"Private Key is: hex: 0x{private_key:x} or int: {private_key} or bitstring: {bin(private_key)} or {bytes.fromhex(hex(private_key)[2:])}")
         else:
             print("No nonce reuse")
+
+
+# Test vectors of RFC 6979 A.2.5 (P-256, SHA-256)
+if __name__ == "__main__":
+    x = 0xC9AFA9D845BA75166B5C215767B1D6934E50C3DB36E89B127B8A622B120F6721
+
+    assert ECDSA.rfc6979_nonce(x, ECDSA.hash_message("sample")) == \
+           0xA6E3C57DD01ABE90086538398355DD4C3B17AA873382B0F24D6129493D8AAD60
+    signature = ECDSA.sign(x, "sample")
+    assert int(signature.get(0)) == 0xEFD48B2AACB6A8FD1140DD9CD45E81D69D2C877B56AAF991C34D0EA84EAF3716
+    assert int(signature.get(1)) == 0xF7CB1C942D657C41D436C7A1B6E29F65F3E900DBB9AFF4064DC4AB2F843ACDA8
+
+    assert ECDSA.rfc6979_nonce(x, ECDSA.hash_message("test")) == \
+           0xD16B6AE827F17175E040871A1C7EC3500192C4C92677336EC2537ACAEE0008E0
+    signature = ECDSA.sign(x, "test")
+    assert int(signature.get(0)) == 0xF1ABB023518351CD71D881567B1EA663ED3EFCF6C5132B354F28D3B0B7D38367
+    assert int(signature.get(1)) == 0x019F4113742A2B14BD25926B49C649155F267E60D3814B4C0CC84250E46F0083
+    print("All tests passed")
@@ -0,0 +1,173 @@
+from functools import cached_property, lru_cache
+
+from asn1parse import ASN1Parser, OctetString, Sequence, Tagged, encodeLength
+from eccalc import EllipticCurve, FiniteField, Point, secp256r1
+from ecdsa import ECDSA, Message
+
+EC_PUBLIC_KEY = "1.2.840.10045.2.1"
+SECP256R1 = "1.2.840.10045.3.1.7"
+# DER of the AlgorithmIdentifier SEQUENCE of id-ecPublicKey with secp256r1
+ALGORITHM_IDENTIFIER = bytes.fromhex("301306072a8648ce3d020106082a8648ce3d030107")
+
+SCALAR_FIELD = FiniteField(secp256r1.n)
+INFINITY = Point(0, 0, True)
+
+
+class FixedBaseTable:
+    """
+    Precomputed multiples d * 2^(window * j) * P of a fixed point for every window j and digit d, so a scalar
+    multiplication is one table lookup and addition per window and no doublings
+    """
+
+    def __init__(self, curve: EllipticCurve, point: Point, bits: int = 256, window: int = 4):
+        self.curve = curve
+        self.window = window
+        self.mask = (1 << window) - 1
+        self.rows = []
+        base = point
+        for _ in range(0, bits, window):
+            row = [INFINITY, base]
+            for _ in range(2, 1 << window):
+                row.append(curve.addPoint(row[-1], base))
+            self.rows.append(row)
+            base = curve.addPoint(row[-1], base)
+
+    def multiply(self, n: int) -> Point:
+        h = INFINITY
+        for row in self.rows:
+            if not n:
+                break
+            if digit := n & self.mask:
+                h = self.curve.addPoint(h, row[digit])
+            n >>= self.window
+        if n:
+            raise ValueError("Scalar exceeds the size of the table")
+        return h
+
+
+@lru_cache(maxsize=1)
+def baseTable() -> FixedBaseTable:
+    """
+    Table of the generator of secp256r1, built once on first use
+    """
+    return FixedBaseTable(secp256r1(), secp256r1.G)
+
+
+def encodeSignature(r: int, s: int) -> bytes:
+    """
+    Encodes a signature as DER SEQUENCE of two INTEGERs without building ASN1 objects
+    """
+    content = b""
+    for value in (r, s):
+        value_bytes = value.to_bytes(value.bit_length() // 8 + 1, 'big')
+        content += b"\x02" + encodeLength(len(value_bytes)) + value_bytes
+    return b"\x30" + encodeLength(len(content)) + content
+
+
+class VerifyingKey:
+    """
+    secp256r1 public key with a fixed-base table of its point, built on first verification
+    """
+
+    def __init__(self, point: Point):
+        if point.infty or not secp256r1().hasPoint(point):
+            raise ValueError("Point is not on secp256r1")
+        self.point = point
+
+    @classmethod
+    def from_der(cls, der: bytes) -> "VerifyingKey":
+        return cls.from_asn1(ASN1Parser().parse(der))
+
+    @classmethod
+    def from_pem(cls, pem: str | bytes) -> "VerifyingKey":
+        return cls.from_asn1(ASN1Parser().parsePEM(pem))
+
+    @classmethod
+    def from_asn1(cls, public_key_info: Sequence) -> "VerifyingKey":
+        algorithm = public_key_info.get(0)
+        if algorithm.get(0) != EC_PUBLIC_KEY or algorithm.get(1) != SECP256R1:
+            raise ValueError("Only secp256r1 public keys are supported")
+        return cls(secp256r1().decodePoint(bytes(public_key_info.get(1).value)))
+
+    @cached_property
+    def table(self) -> FixedBaseTable:
+        return FixedBaseTable(secp256r1(), self.point)
+
+    def to_der(self, compressed: bool = False) -> bytes:
+        bit_string = b"\x00" + secp256r1().encodePoint(self.point, compressed)
+        content = ALGORITHM_IDENTIFIER + b"\x03" + encodeLength(len(bit_string)) + bit_string
+        return b"\x30" + encodeLength(len(content)) + content
+
+    def verify_digest(self, signature: bytes | Sequence, e: int | bytes) -> bool:
+        if isinstance(signature, bytes):
+            signature = ASN1Parser().parse(signature)
+        r, s = int(signature.get(0)), int(signature.get(1))
+        if not (1 <= r < secp256r1.n and 1 <= s < secp256r1.n):
+            return False
+        if isinstance(e, bytes):
+            e = int.from_bytes(e, byteorder='big')
+
+        w = SCALAR_FIELD.inverse(s)
+        X = secp256r1().addPoint(baseTable().multiply(SCALAR_FIELD.multiply(e, w)),
+                                 self.table.multiply(SCALAR_FIELD.multiply(r, w)))
+        return not X.infty and X.x % secp256r1.n == r
+
+    def verify(self, signature: bytes | Sequence, m: Message) -> bool:
+        return self.verify_digest(signature, ECDSA.hash_message(m))
+
+
+class SigningKey:
+    """
+    secp256r1 private key, signatures use the shared generator table, the cached scalar field and the
+    cached RFC 6979 key setup of ECDSA
+    """
+
+    def __init__(self, d: int):
+        if not 1 <= d < secp256r1.n:
+            raise ValueError("Private key out of range")
+        self.d = d
+
+    @classmethod
+    def from_der(cls, der: bytes) -> "SigningKey":
+        return cls.from_asn1(ASN1Parser().parse(der))
+
+    @classmethod
+    def from_pem(cls, pem: str | bytes) -> "SigningKey":
+        return cls.from_asn1(ASN1Parser().parsePEM(pem))
+
+    @classmethod
+    def from_asn1(cls, private_key: Sequence) -> "SigningKey":
+        """
+        Loads a key from a SEC1 ECPrivateKey (EC PRIVATE KEY) or a PKCS#8 PrivateKeyInfo (PRIVATE KEY)
+        """
+        if isinstance(private_key.get(2), OctetString):  # PKCS#8
+            algorithm = private_key.get(1)
+            if algorithm.get(0) != EC_PUBLIC_KEY or algorithm.get(1) != SECP256R1:
+                raise ValueError("Only secp256r1 private keys are supported")
+            private_key = ASN1Parser().parse(private_key.get(2).value)
+
+        for element in private_key.content[2:]:
+            if isinstance(element, Tagged) and element.tag == 0xa0 and element.get(0) != SECP256R1:
+                raise ValueError("Only secp256r1 private keys are supported")
+        return cls(int(private_key.get(1)))
+
+    @cached_property
+    def verifying_key(self) -> VerifyingKey:
+        return VerifyingKey(baseTable().multiply(self.d))
+
+    def sign_digest(self, e: int | bytes, k: int | None = None) -> bytes:
+        """
+        Signs a SHA-256 message hash and returns the DER encoded signature
+        """
+        if isinstance(e, bytes):
+            e = int.from_bytes(e, byteorder='big')
+        if k is None:
+            k = ECDSA.rfc6979_nonce(self.d, e)
+
+        r = baseTable().multiply(k).x % secp256r1.n
+        s = SCALAR_FIELD.multiply(e + r * self.d, SCALAR_FIELD.inverse(k))
+        return encodeSignature(r, s)
+
+    def sign(self, m: Message, k: int | None = None) -> bytes:
+        return self.sign_digest(ECDSA.hash_message(m), k)
+
@@ -0,0 +1,126 @@
+import argparse
+import sqlite3
+from dataclasses import dataclass, field
+from itertools import groupby
+from typing import Iterable, Iterator
+
+from asn1parse import LazyTLV, Sequence, iterFile
+from ecdsa import ECDSA
+
+# Number of signatures inserted into the index file per transaction
+COMMIT_BATCH = 10_000
+
+
+@dataclass(slots=True)
+class CompromisedKey:
+    private_key: int
+    r: int
+    signatures: list[int] = field(default_factory=list)
+
+    def __repr__(self):
+        return f"CompromisedKey(0x{self.private_key:x}, r=0x{self.r:x}, signatures={self.signatures})"
+
+
+class NonceReuseScanner:
+    """
+    Finds reused nonces across any number of signatures in one linear pass by indexing them by r.
+    The key recovery only runs for signatures whose r collides with an earlier one. By default the index is a
+    dict holding the first signature per r, with an index file it is an SQLite table sorted on disk instead,
+    for corpora that do not fit into memory.
+    """
+
+    def __init__(self, index_filename: str | None = None):
+        self.count = 0
+        self.first: dict[int, tuple[int, int, int]] = {}
+        self.found: dict[int, CompromisedKey] = {}
+        self.database = None
+        if index_filename:
+            self.database = sqlite3.connect(index_filename)
+            # rows of an earlier scan would mix into this one with clashing indices, every scan starts empty
+            self.database.execute("DROP TABLE IF EXISTS signatures")
+            self.database.execute("CREATE TABLE signatures (r TEXT, idx INTEGER, e TEXT, s TEXT)")
+            self.database.commit()
+
+    def add(self, message: str | bytes, signature: bytes | Sequence | LazyTLV):
+        """
+        Indexes a single signature
+        :param message: signed message
+        :param signature: DER encoded or parsed signature
+        """
+        if isinstance(signature, (bytes, bytearray, memoryview)):
+            signature = LazyTLV(memoryview(signature), 0)
+        r, s = int(signature.get(0)), int(signature.get(1))
+        e = ECDSA.hash_message(message)
+        index = self.count
+        self.count += 1
+
+        if self.database is not None:
+            self.database.execute("INSERT INTO signatures VALUES (?, ?, ?, ?)",
+                                  (f"{r:064x}", index, f"{e:x}", f"{s:x}"))
+            if self.count % COMMIT_BATCH == 0:
+                self.database.commit()
+            return
+
+        entry = (index, e, s)
+        if (first := self.first.setdefault(r, entry)) is not entry:
+            self.collide(r, first, entry)
+
+    def collide(self, r: int, first: tuple[int, int, int], other: tuple[int, int, int]):
+        """
+        Handles a signature whose r was already seen, the private key is recovered once per r
+        """
+        if r in self.found:
+            self.found[r].signatures.append(other[0])
+            return
+        (first_index, e1, s1), (index, e2, s2) = first, other
+        if s1 == s2:
+            # same signature of the same message, this does not reveal anything
+            return
+        self.found[r] = CompromisedKey(ECDSA.recover_private_key(r, s1, s2, e1, e2), r, [first_index, index])
+
+    def scan(self, pairs: Iterable[tuple[str | bytes, bytes | Sequence | LazyTLV]]) -> list[CompromisedKey]:
+        """
+        Indexes all (message, signature) pairs and returns the compromised keys
+        """
+        for message, signature in pairs:
+            self.add(message, signature)
+        return list(self.compromised())
+
+    def compromised(self) -> Iterator[CompromisedKey]:
+        """
+        Yields one compromised key per reused r
+        """
+        if self.database is None:
+            yield from self.found.values()
+            return
+
+        self.database.execute("CREATE INDEX IF NOT EXISTS signatures_r ON signatures (r)")
+        self.database.commit()
+        rows = self.database.execute(
+            "SELECT r, idx, e, s FROM signatures WHERE r IN "
+            "(SELECT r FROM signatures GROUP BY r HAVING COUNT(*) > 1) ORDER BY r, idx")
+        for r, group in groupby(rows, key=lambda row: row[0]):
+            r = int(r, 16)
+            first, *others = [(index, int(e, 16), int(s, 16)) for _, index, e, s in group]
+            for other in others:
+                self.collide(r, first, other)
+            if r in self.found:
+                yield self.found.pop(r)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Finds reused ECDSA nonces and recovers the private keys")
+    parser.add_argument("signatures", help="File of concatenated DER signatures")
+    parser.add_argument("messages", help="File with the signed utf-8 messages, one per line in signature order")
+    parser.add_argument("-i", "--index", help="SQLite index file for corpora larger than memory")
+
+    args = parser.parse_args()
+    scanner = NonceReuseScanner(args.index)
+    with open(args.messages, 'rb') as f:
+        messages = (line.rstrip(b"\n") for line in f)
+        try:
+            # a missing line would pair every later signature with the wrong message
+            for key in scanner.scan(zip(messages, iterFile(args.signatures), strict=True)):
+                print(f"Nonce reuse in signatures {key.signatures}, private key is: hex: 0x{key.private_key:x}")
+        except ValueError:
+            parser.error(f"{args.messages} does not have one line per signature in {args.signatures}")
@@ -5,8 +5,9 @@ from secrets import randbits
 def task1and2():
     with open('signature.bin', 'wb') as f:
         print("Task1+2:")
+        # deterministic nonce according to RFC 6979
         content = bytes(ECDSA.sign(0xd9c73e5dcfbf0e5b04dfdd261ff597b2a9098af481d321cdf156f0d7bd7791b1,
-                                   "superTolleTestNachricht", randbits(256)))
+                                   "superTolleTestNachricht"))
         print(f"Calculated signature content as: 0x{content.hex()}")
         print("Writing to file signature.bin")
         f.write(content)
@@ -18,13 +19,13 @@ def task3():
     with open('bauer_spezial/signature1.bin', 'rb') as f:
         sig1 = f.read()
 
-    with open('bauer_spezial/message1.bin') as f:
+    with open('bauer_spezial/message1.bin', 'rb') as f:
         cont1 = f.read()
 
     with open('bauer_spezial/signature2.bin', 'rb') as f:
         sig2 = f.read()
 
-    with open('bauer_spezial/message2.bin') as f:
+    with open('bauer_spezial/message2.bin', 'rb') as f:
         cont2 = f.read()
 
     ECDSA.determine_nonce_reuse(sig1, sig2, cont1, cont2)
@@ -36,20 +37,15 @@ def task4():
     nonce = randbits(256)
 
     print(f"Creating messages in directory my_messages...")
-    with open('my_messages/message1.bin') as f:
-        cont = f.read()
-
-    with open('my_messages/signature1.bin', 'wb') as f:
+    # the messages are hashed in chunks straight from the files
+    with open('my_messages/message1.bin', 'rb') as message, open('my_messages/signature1.bin', 'wb') as f:
         f.write(bytes(
-            ECDSA.sign(0x68747470733a2f2f796f7574752e62652f78786e6831437752634f67, cont, nonce)
+            ECDSA.sign(0x68747470733a2f2f796f7574752e62652f78786e6831437752634f67, message, nonce)
         ))
 
-    with open('my_messages/message2.bin') as f:
-        cont = f.read()
-
-    with open('my_messages/signature2.bin', 'wb') as f:
+    with open('my_messages/message2.bin', 'rb') as message, open('my_messages/signature2.bin', 'wb') as f:
         f.write(bytes(
-            ECDSA.sign(0x68747470733a2f2f796f7574752e62652f78786e6831437752634f67, cont, nonce)
+            ECDSA.sign(0x68747470733a2f2f796f7574752e62652f78786e6831437752634f67, message, nonce)
         ))
     print("Done")
     print("\n")
@@ -60,13 +56,13 @@ def task4_check():
     with open('my_messages/signature1.bin', 'rb') as f:
         sig1 = f.read()
 
-    with open('my_messages/message1.bin') as f:
+    with open('my_messages/message1.bin', 'rb') as f:
         cont1 = f.read()
 
     with open('my_messages/signature2.bin', 'rb') as f:
         sig2 = f.read()
 
-    with open('my_messages/message2.bin') as f:
+    with open('my_messages/message2.bin', 'rb') as f:
         cont2 = f.read()
 
     ECDSA.determine_nonce_reuse(sig1, sig2, cont1, cont2)
@@ -0,0 +1,313 @@
+import argparse
+import asyncio
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import BrokenExecutor, ProcessPoolExecutor
+from statistics import quantiles
+
+from ecdsa import ECDSA
+from keys import SigningKey, baseTable
+
+# Signing key of a worker process, set once by the pool initializer
+signer: SigningKey | None = None
+
+
+def init_signer(d: int):
+    """
+    Pool initializer, builds the key and the generator table once per worker instead of once per request
+    """
+    global signer
+    signer = SigningKey(d)
+    baseTable()
+
+
+def sign_batch(digests: list[int]) -> list[bytes]:
+    return [signer.sign_digest(e) for e in digests]
+
+
+class SigningServer:
+    """
+    Local signing service speaking newline-delimited JSON. Requests arriving within the batch window are
+    coalesced and split across a process pool whose workers hold the precomputed key state.
+
+    Requests are {"id": ..., "message": hex} or {"id": ..., "digest": hex} and answered with
+    {"id": ..., "signature": DER hex} or {"id": ..., "error": text}; {"id": ..., "metrics": true} returns the
+    queue depth and latency metrics. Answers may arrive out of order, the id correlates them.
+    """
+
+    def __init__(self, key: SigningKey, processes: int | None = None, window: float = 0.002,
+                 max_batch: int = 256):
+        self.key = key
+        self.processes = processes or os.cpu_count() or 1
+        self.window = window
+        self.max_batch = max_batch
+        self.queue: asyncio.Queue | None = None
+        self.executor: ProcessPoolExecutor | None = None
+        self.server: asyncio.AbstractServer | None = None
+        self.batcher: asyncio.Task | None = None
+        self.handlers: set[asyncio.Task] = set()
+        # the event loop only keeps weak references to tasks, running dispatches would be collected otherwise
+        self.dispatches: set[asyncio.Task] = set()
+        self.in_flight = 0
+        self.signed = 0
+        self.batches = 0
+        self.batched = 0
+        self.latencies = deque(maxlen=4096)
+
+    async def start(self, path: str | None = None, host: str = "127.0.0.1", port: int = 0):
+        """
+        Starts the pool and listens on a UNIX socket if a path is given, on TCP otherwise
+        """
+        self.queue = asyncio.Queue()
+        self.executor = self.create_executor()
+        self.batcher = asyncio.create_task(self.run_batches())
+        if path:
+            self.server = await asyncio.start_unix_server(self.handle, path)
+        else:
+            self.server = await asyncio.start_server(self.handle, host, port)
+
+    def create_executor(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(self.processes, initializer=init_signer, initargs=(self.key.d,))
+
+    @property
+    def address(self):
+        return self.server.sockets[0].getsockname()
+
+    async def close(self):
+        self.server.close()
+        for handler in self.handlers:
+            handler.cancel()
+        await asyncio.gather(*self.handlers, return_exceptions=True)
+        await self.server.wait_closed()
+        self.batcher.cancel()
+        await asyncio.gather(self.batcher, return_exceptions=True)
+        for dispatch in self.dispatches:
+            dispatch.cancel()
+        await asyncio.gather(*self.dispatches, return_exceptions=True)
+        # shutdown joins the worker processes, which would block the event loop
+        await asyncio.to_thread(self.executor.shutdown, cancel_futures=True)
+
+    async def sign_digest(self, e: int) -> bytes:
+        """
+        Queues a digest for the next batch and waits for its signature
+        """
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((e, future, time.perf_counter()))
+        return await future
+
+    async def run_batches(self):
+        """
+        Collects requests until the window after the first one has passed or the batch is full and hands the
+        batch to the pool without waiting for it, so batches overlap under load
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.window
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), deadline - loop.time()))
+                except asyncio.TimeoutError:
+                    break
+            self.batches += 1
+            self.batched += len(batch)
+            size = -(-len(batch) // self.processes)
+            for i in range(0, len(batch), size):
+                dispatch = asyncio.create_task(self.dispatch(batch[i:i + size]))
+                self.dispatches.add(dispatch)
+                dispatch.add_done_callback(self.dispatches.discard)
+
+    async def dispatch(self, batch: list):
+        """
+        Signs part of a batch in the pool. If a worker died, the broken pool is replaced by a new one, the requests
+        of all parts sent to the broken pool fail.
+        """
+        self.in_flight += len(batch)
+        executor = self.executor
+        try:
+            signatures = await asyncio.get_running_loop().run_in_executor(
+                executor, sign_batch, [e for e, _, _ in batch])
+        except Exception as error:
+            if isinstance(error, BrokenExecutor) and self.executor is executor:
+                self.executor = self.create_executor()
+                executor.shutdown(wait=False)
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(error)
+            return
+        finally:
+            self.in_flight -= len(batch)
+
+        now = time.perf_counter()
+        for (_, future, queued), signature in zip(batch, signatures):
+            self.latencies.append(now - queued)
+            if not future.done():
+                future.set_result(signature)
+        self.signed += len(batch)
+
+    def metrics(self) -> dict:
+        """
+        :return: queue depth, requests being signed, totals and the latency of the last 4096 requests in ms
+        """
+        latencies = sorted(self.latencies)
+        metrics = {
+            "queue_depth": self.queue.qsize(),
+            "in_flight": self.in_flight,
+            "signed": self.signed,
+            "batches": self.batches,
+            "mean_batch_size": self.batched / self.batches if self.batches else 0,
+        }
+        if len(latencies) >= 2:
+            percentiles = quantiles(latencies, n=100)
+            metrics |= {"latency_p50_ms": 1000 * percentiles[49], "latency_p99_ms": 1000 * percentiles[98],
+                        "latency_max_ms": 1000 * latencies[-1]}
+        return metrics
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        handler = asyncio.current_task()
+        self.handlers.add(handler)
+        tasks = set()
+        try:
+            while line := await reader.readline():
+                task = asyncio.create_task(self.respond(line, writer))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.wait(tasks)
+        except (asyncio.CancelledError, ConnectionError):
+            pass
+        finally:
+            self.handlers.discard(handler)
+            writer.close()
+
+    async def respond(self, line: bytes, writer: asyncio.StreamWriter):
+        response = {}
+        try:
+            request = json.loads(line)
+            response["id"] = request.get("id")
+            if request.get("metrics"):
+                response["metrics"] = self.metrics()
+            elif "digest" in request:
+                response["signature"] = (await self.sign_digest(int(request["digest"], 16))).hex()
+            else:
+                e = ECDSA.hash_message(bytes.fromhex(request["message"]))
+                response["signature"] = (await self.sign_digest(e)).hex()
+        except Exception as error:
+            # every request is answered, also if signing failed, otherwise the client waits forever
+            response["error"] = str(error) or type(error).__name__
+        if not writer.is_closing():
+            writer.write(json.dumps(response).encode() + b"\n")
+            try:
+                # waits while the buffer of a slow client is full instead of growing it without limit
+                await writer.drain()
+            except ConnectionError:
+                pass
+
+
+class SigningClient:
+    """
+    Client for the signing server, requests are pipelined over one connection and can be awaited concurrently
+    """
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self.next_id = 0
+        self.pending: dict[int, asyncio.Future] = {}
+        self.receiver = asyncio.create_task(self.receive())
+
+    @classmethod
+    async def connect(cls, path: str | None = None, host: str = "127.0.0.1", port: int = 0) -> "SigningClient":
+        if path:
+            return cls(*await asyncio.open_unix_connection(path))
+        return cls(*await asyncio.open_connection(host, port))
+
+    async def receive(self):
+        while line := await self.reader.readline():
+            response = json.loads(line)
+            if (future := self.pending.pop(response["id"], None)) is not None and not future.done():
+                future.set_result(response)
+        for future in self.pending.values():
+            future.set_exception(ConnectionError("Signing server closed the connection"))
+
+    async def request(self, **fields) -> dict:
+        request_id = self.next_id
+        self.next_id += 1
+        future = asyncio.get_running_loop().create_future()
+        self.pending[request_id] = future
+        self.writer.write(json.dumps({"id": request_id} | fields).encode() + b"\n")
+        await self.writer.drain()
+        response = await future
+        if "error" in response:
+            raise ValueError(response["error"])
+        return response
+
+    async def sign(self, message: bytes) -> bytes:
+        """
+        :return: DER encoded signature of the message
+        """
+        return bytes.fromhex((await self.request(message=message.hex()))["signature"])
+
+    async def sign_digest(self, e: int | bytes) -> bytes:
+        if isinstance(e, bytes):
+            e = int.from_bytes(e, byteorder='big')
+        return bytes.fromhex((await self.request(digest=f"{e:x}"))["signature"])
+
+    async def metrics(self) -> dict:
+        return (await self.request(metrics=True))["metrics"]
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+        self.receiver.cancel()
+
+
+async def benchmark(server: SigningServer, requests: int, clients: int):
+    """
+    Signs requests distinct messages from concurrent clients and prints the throughput and server metrics
+    """
+    if isinstance(server.address, str):
+        connections = [await SigningClient.connect(server.address) for _ in range(clients)]
+    else:
+        connections = [await SigningClient.connect(host=server.address[0], port=server.address[1])
+                       for _ in range(clients)]
+    start = time.perf_counter()
+    signatures = await asyncio.gather(*(connections[i % clients].sign(f"message {i}".encode())
+                                         for i in range(requests)))
+    seconds = time.perf_counter() - start
+    verifying_key = server.key.verifying_key
+    assert all(verifying_key.verify(signature, f"message {i}".encode()) for i, signature in enumerate(signatures))
+    print(f"{requests} signatures in {seconds:.3f}s: {requests / seconds:.0f}/s")
+    print(json.dumps(await connections[0].metrics(), indent=2))
+    for connection in connections:
+        await connection.close()
+
+
+async def main(args):
+    with open(args.key, 'rb') as f:
+        server = SigningServer(SigningKey.from_pem(f.read()), args.processes, args.window / 1000, args.batch)
+    await server.start(args.socket, port=args.port)
+    print(f"Signing server listening on {server.address}")
+    try:
+        if args.benchmark:
+            await benchmark(server, args.benchmark, args.clients)
+        else:
+            await server.server.serve_forever()
+    finally:
+        await server.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local ECDSA signing server with request coalescing")
+    parser.add_argument("key", help="PEM file of the secp256r1 private key")
+    parser.add_argument("-s", "--socket", help="UNIX socket path, TCP on localhost is used if not given")
+    parser.add_argument("--port", type=int, default=8765, help="TCP port")
+    parser.add_argument("-p", "--processes", type=int, help="Signing processes, defaults to the number of CPUs")
+    parser.add_argument("-w", "--window", type=float, default=2, help="Batch window in milliseconds")
+    parser.add_argument("-b", "--batch", type=int, default=256, help="Maximum number of requests per batch")
+    parser.add_argument("--benchmark", type=int, metavar="N", help="Sign N messages from local clients and exit")
+    parser.add_argument("--clients", type=int, default=8, help="Concurrent connections of the benchmark")
+
+    asyncio.run(main(parser.parse_args()))
@@ -1,6 +1,12 @@
 import copy
+import sys
 from dataclasses import dataclass
-from logging import debug
+from pathlib import Path
+
+# montgomery is a package next to this directory, like fermat imports it when run from the repository root
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from montgomery import instrumentation
+from montgomery.instrumentation import instrumented
 
 
 @dataclass(frozen=True, slots=True)
@@ -25,7 +31,6 @@ class FieldElement:
     def __mul__(self, other):
         temp = FieldElement(0, self.field)
         if isinstance(other, int):
-            debug(f"Multiplying {self.value} with {other}")
             for i in range(other):
                 temp += self
             return temp
@@ -33,20 +38,15 @@ class FieldElement:
         if not isinstance(other, FieldElement):
             raise TypeError
 
+        if instrumentation.operations is not None:
+            instrumentation.operations["multiply"] += 1
         for i in range(other.value.bit_length(), -1, -1):
             if (other.value >> i) & 1:
-                debug(f"Bit {i} is set, proceeding with leftshift")
                 temp.value ^= self.value << i
-                debug(f"temp after leftshift is {temp.value:b}")
             while temp.value >> self.field.module_exponent > 0:
-                debug("need reducing")
-                debug(
-                    f"reducing with {self.field.polynomial << (temp.value.bit_length() - 1 - self.field.module_exponent):b}"
-                )
                 temp.value ^= self.field.polynomial << (
                     temp.value.bit_length() - 1 - self.field.module_exponent
                 )
-                debug(f"temp after reducing is {temp.value:b}")
         return temp
 
     def __pow__(self, power, modulo=None):
@@ -76,6 +76,8 @@ class FieldElement:
         return "+".join(set_bits)
 
     def invert(self):
+        if instrumentation.operations is not None:
+            instrumentation.operations["inverse"] += 1
         if self.value == 1:
             return FieldElement(1, self.field)
         for i in range(2, 2**self.field.module_exponent):
@@ -114,12 +116,12 @@ class EllipticCurve:
         self.a = FieldElement(a, self.field)
         self.b = FieldElement(b, self.field)
 
-    def hasPoint(self, p: Point, debug=False) -> bool:
-        if debug:
-            print(f"{p.y ** 2 + p.x * p.y + p.x ** 3 + p.x ** 2 * self.a + self.b=}")
+    def hasPoint(self, p: Point) -> bool:
+        if instrumentation.tracer is not None:
+            instrumentation.tracer(f"{p.y ** 2 + p.x * p.y + p.x ** 3 + p.x ** 2 * self.a + self.b=}")
         return p.y**2 + p.x * p.y + p.x**3 + p.x**2 * self.a + self.b == 0
 
-    def addPoint(self, p: Point, q: Point, debug=False):
+    def addPoint(self, p: Point, q: Point):
         null = FieldElement(0, self.field)
         if p.x == 0 and p.y == 0 and p.infty:
             return q
@@ -134,44 +136,48 @@ class EllipticCurve:
             return Point(null, null, self.field, True)
 
         elif p.x != q.x:
+            if instrumentation.operations is not None:
+                instrumentation.operations["add"] += 1
             dividor = q.x + p.x
             m = q.y + p.y
             m = m * dividor.invert()
 
-            if debug:
-                print(f"\t\t{m=}")
+            if instrumentation.tracer is not None:
+                instrumentation.tracer(f"\t\t{m=}")
 
             u = m**2 + m + self.a + p.x + q.x
             v = m * (u + p.x) + u + p.y
             return Point(u, v, self.field)
 
         else:
+            if instrumentation.operations is not None:
+                instrumentation.operations["double"] += 1
             m = p.x + p.y * p.x.invert()
 
-            if debug:
-                print(f"\t\t{m=}")
+            if instrumentation.tracer is not None:
+                instrumentation.tracer(f"\t\t{m=}")
 
             u = m**2 + m + self.a
             v = m * (p.x + u) + u + p.y
             return Point(u, v, self.field)
 
-    def multiplyPoint(self, p: Point, n: int, debug=False):
+    def multiplyPoint(self, p: Point, n: int):
         h = copy.deepcopy(p)
         for i in range(n.bit_length() - 2, -1, -1):
-            if debug:
-                print(f"{i=}:\tadding {h} and {h}")
-            h = self.addPoint(h, h, debug)
-            if debug:
-                print(f"\t\tis: {h=}")
+            if instrumentation.tracer is not None:
+                instrumentation.tracer(f"{i=}:\tadding {h} and {h}")
+            h = self.addPoint(h, h)
+            if instrumentation.tracer is not None:
+                instrumentation.tracer(f"\t\tis: {h=}")
             if (n >> i) & 1:
-                if debug:
-                    print(f"\t\tadding {h} and {p} because bit is set")
-                h = self.addPoint(h, p, debug)
-            if debug:
-                print(f"\t\th_{i}={h}")
+                if instrumentation.tracer is not None:
+                    instrumentation.tracer(f"\t\tadding {h} and {p} because bit is set")
+                h = self.addPoint(h, p)
+            if instrumentation.tracer is not None:
+                instrumentation.tracer(f"\t\th_{i}={h}")
         return h
 
-    def findOrder(self, p: Point, elements: int, debug=False):
+    def findOrder(self, p: Point, elements: int):
         if p.infty:
             return 1
         # Testing all possible orders to be able to use more curves
@@ -179,41 +185,41 @@ class EllipticCurve:
         for i in range(2, 2**self.field.module_exponent):
             if elements % i != 0:
                 continue
-            if self.multiplyPoint(p, i, debug).infty:
+            if self.multiplyPoint(p, i).infty:
                 return i
             print(f"ord(P) != {i}")
         raise ValueError
 
 
-# logging.basicConfig(level=logging.DEBUG)
-
-el = EllipticCurve(0xA, 0xD, 4, 0x13)
+if __name__ == "__main__":
+    el = EllipticCurve(0xA, 0xD, 4, 0x13)
 
-p = Point(0xC, 0xA, el.field)
+    p = Point(0xC, 0xA, el.field)
 
-print(f"P liegt auf E: {el.hasPoint(p, True)}")
-print()
+    with instrumented(trace=print):
+        print(f"P liegt auf E: {el.hasPoint(p)}")
+        print()
 
-print(f"ord(P) = {el.findOrder(p, 22, True)}")
-print()
+        print(f"ord(P) = {el.findOrder(p, 22)}")
+        print()
 
-k_pra = 7
-k_prb = 5
+        k_pra = 7
+        k_prb = 5
 
-k_puba = el.multiplyPoint(p, k_pra, True)
-print("Public Key Alice:", k_puba)
+        k_puba = el.multiplyPoint(p, k_pra)
+        print("Public Key Alice:", k_puba)
 
-print("\n")
+        print("\n")
 
-k_pubb = el.multiplyPoint(p, k_prb, True)
-print("Public Key Bob:", k_pubb)
+        k_pubb = el.multiplyPoint(p, k_prb)
+        print("Public Key Bob:", k_pubb)
 
-print("\n")
+        print("\n")
 
-shared_key = el.multiplyPoint(k_pubb, k_pra, True)
-assert shared_key == el.multiplyPoint(k_puba, k_prb, True)
+        shared_key = el.multiplyPoint(k_pubb, k_pra)
+    assert shared_key == el.multiplyPoint(k_puba, k_prb)
 
-print("Shared Key:", shared_key)
+    print("Shared Key:", shared_key)
 
-assert shared_key == el.multiplyPoint(k_pubb, k_pra)
-assert el.hasPoint(shared_key)
+    assert shared_key == el.multiplyPoint(k_pubb, k_pra)
+    assert el.hasPoint(shared_key)
@@ -1,4 +1,11 @@
+import sys
 from dataclasses import dataclass
+from pathlib import Path
+
+# montgomery is a package next to this directory, like fermat imports it when run from the repository root
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from montgomery import instrumentation
+from montgomery.instrumentation import instrumented
 
 
 class FiniteField:
@@ -14,15 +21,38 @@ class FiniteField:
         return x % self.module
 
     def multiply(self, a, b):
+        if instrumentation.operations is not None:
+            instrumentation.operations["multiply"] += 1
         return (a * b) % self.module
 
     def inverse(self, x):
-        if x == 1:
-            return 1
-        for i in range(2, self.module):
-            if self.multiply(x, i) == 1:
-                return i
-        raise ValueError(f"Cannot find inverse for {x}")
+        if instrumentation.operations is not None:
+            instrumentation.operations["inverse"] += 1
+        try:
+            return pow(x, -1, self.module)
+        except ValueError:
+            raise ValueError(f"Cannot find inverse for {x}") from None
+
+
+def wnaf(n: int, width: int) -> list[int]:
+    """
+    Width-w non-adjacent form of n: odd digits in (-2^(w-1), 2^(w-1)), at most one in w consecutive ones is
+    non-zero. Copy of wnaf in ecdsa/eccalc.py, as this directory does not import from ecdsa.
+    :param n: non-negative scalar
+    :param width: window width w >= 2
+    :return: digits, least significant first
+    """
+    digits = []
+    while n:
+        digit = 0
+        if n & 1:
+            digit = n & ((1 << width) - 1)
+            if digit >= 1 << (width - 1):
+                digit -= 1 << width
+            n -= digit
+        digits.append(digit)
+        n >>= 1
+    return digits
 
 
 @dataclass
@@ -41,12 +71,12 @@ class EllipticCurve:
         self.b = b
         self.field = FiniteField(module)
 
-    def hasPoint(self, p: Point, debug=False) -> bool:
-        if debug:
-            print(f"{p.y ** 2 + p.x * p.y + p.x ** 3 + p.x ** 2 * self.a + self.b=}")
+    def hasPoint(self, p: Point) -> bool:
+        if instrumentation.tracer is not None:
+            instrumentation.tracer(f"{p.y ** 2 + p.x * p.y + p.x ** 3 + p.x ** 2 * self.a + self.b=}")
         return (p.y**2 - p.x**3 - self.a * p.x - self.b) % self.field.module == 0
 
-    def addPoint(self, p: Point, q: Point, debug=False):
+    def addPoint(self, p: Point, q: Point):
         if p.x == 0 and p.y == 0 and p.infty:
             return q
 
@@ -57,68 +87,97 @@ class EllipticCurve:
             return Point(0, 0, True)
 
         elif p.x != q.x:
+            if instrumentation.operations is not None:
+                instrumentation.operations["add"] += 1
             dividor = self.field.add(q.x, -p.x)
             m = self.field.add(q.y, -p.y)
             m = self.field.multiply(m, self.field.inverse(dividor))
 
-            if debug:
-                print(f"\t\t{m=}")
+            if instrumentation.tracer is not None:
+                instrumentation.tracer(f"\t\t{m=}")
 
             u = self.field.add(self.field.multiply(m, m), -(q.x + p.x))
             v = self.field.add(self.field.multiply(m, self.field.add(u, -p.x)), p.y)
             return Point(u, self.field.reduce(-v))
 
         else:
+            if instrumentation.operations is not None:
+                instrumentation.operations["double"] += 1
             dividor = self.field.multiply(2, p.y)
             m = self.field.add(
                 self.field.multiply(3, self.field.multiply(p.x, p.x)), self.a
             )
             m = self.field.multiply(m, self.field.inverse(dividor))
 
-            if debug:
-                print(f"\t\t{m=}")
+            if instrumentation.tracer is not None:
+                instrumentation.tracer(f"\t\t{m=}")
 
             u = self.field.add(self.field.multiply(m, m), -(2 * p.x))
             v = self.field.add(self.field.multiply(m, self.field.add(u, -p.x)), p.y)
 
             return Point(u, self.field.reduce(-v))
 
-    def multiplyPoint(self, p: Point, n: int, debug=False):
+    def multiplyPoint(self, p: Point, n: int):
         h = p
         for i in range(n.bit_length() - 2, -1, -1):
-            if debug:
-                print(f"{i=}:\tadding {h} and {h}")
-            h = self.addPoint(h, h, debug)
-            if debug:
-                print(f"\t\tis: {h=}")
+            if instrumentation.tracer is not None:
+                instrumentation.tracer(f"{i=}:\tadding {h} and {h}")
+            h = self.addPoint(h, h)
+            if instrumentation.tracer is not None:
+                instrumentation.tracer(f"\t\tis: {h=}")
             if (n >> i) & 1:
-                if debug:
-                    print(f"\t\tadding {h} and {p} because bit is set")
-                h = self.addPoint(h, p, debug)
-            if debug:
-                print(f"\t\th_{i}={h}")
+                if instrumentation.tracer is not None:
+                    instrumentation.tracer(f"\t\tadding {h} and {p} because bit is set")
+                h = self.addPoint(h, p)
+            if instrumentation.tracer is not None:
+                instrumentation.tracer(f"\t\th_{i}={h}")
+        return h
+
+    def negatePoint(self, p: Point) -> Point:
+        return p if p.infty else Point(p.x, self.field.reduce(-p.y))
+
+    def multiplyPointNAF(self, p: Point, n: int, width: int = 4) -> Point:
+        """
+        Multiplies a point using the width-w NAF of n, costs about n.bit_length() / (width + 1) additions
+        with a table of the 2^(width-2) odd multiples P, 3P, 5P, ...
+        """
+        double = self.addPoint(p, p)
+        table = [p]
+        for _ in range((1 << (width - 2)) - 1):
+            table.append(self.addPoint(table[-1], double))
+
+        h = Point(0, 0, True)
+        for digit in reversed(wnaf(n, width)):
+            h = self.addPoint(h, h)
+            if digit > 0:
+                h = self.addPoint(h, table[digit >> 1])
+            elif digit < 0:
+                h = self.addPoint(h, self.negatePoint(table[-digit >> 1]))
         return h
 
 
-el = EllipticCurve(1, 679, 1151)
-p = Point(501, 449)
-k_pra = 199
-k_prb = 211
+if __name__ == "__main__":
+    el = EllipticCurve(1, 679, 1151)
+    p = Point(501, 449)
+    k_pra = 199
+    k_prb = 211
 
-k_puba = el.multiplyPoint(p, k_pra, True)
-print("Public Key Alice:", k_puba)
+    with instrumented(trace=print):
+        k_puba = el.multiplyPoint(p, k_pra)
+        print("Public Key Alice:", k_puba)
 
-print("\n")
+        print("\n")
 
-k_pubb = el.multiplyPoint(p, k_prb, True)
-print("Public Key Bob:", k_pubb)
+        k_pubb = el.multiplyPoint(p, k_prb)
+        print("Public Key Bob:", k_pubb)
 
-print("\n")
+        print("\n")
 
-shared_key = el.multiplyPoint(k_pubb, k_pra, True)
-assert shared_key == el.multiplyPoint(k_puba, k_prb)
+        shared_key = el.multiplyPoint(k_pubb, k_pra)
+    assert shared_key == el.multiplyPoint(k_puba, k_prb)
+    assert shared_key == el.multiplyPointNAF(k_pubb, k_pra) == el.multiplyPointNAF(k_puba, k_prb, 3)
 
-print("Shared Key:", shared_key)
+    print("Shared Key:", shared_key)
 
-assert shared_key == el.multiplyPoint(k_pubb, k_pra)
-assert el.hasPoint(shared_key)
+    assert shared_key == el.multiplyPoint(k_pubb, k_pra)
+    assert el.hasPoint(shared_key)
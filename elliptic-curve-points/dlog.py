@@ -0,0 +1,330 @@
+import argparse
+import math
+import os
+import random
+import sys
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from pathlib import Path
+
+import char2
+import charg3
+
+# montgomery is a package next to this directory, like fermat imports it when run from the repository root
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from montgomery.montgomery_ladder import ladder
+
+# Baby step tables larger than this trade memory for additional giant steps
+MAX_TABLE_SIZE = 1 << 20
+
+
+@dataclass(frozen=True, slots=True)
+class DiscreteLog:
+    value: int
+    iterations: int
+
+
+class CurveGroup:
+    """
+    Cyclic group generated by a point of a charg3 (prime field) or char2 (binary field) EllipticCurve
+    """
+
+    def __init__(self, curve: charg3.EllipticCurve | char2.EllipticCurve, generator, order: int | None = None):
+        self.curve = curve
+        self.generator = generator
+        if isinstance(curve, char2.EllipticCurve):
+            self.identity = char2.Point(0, 0, curve.field, True)
+            q = 2 ** curve.field.module_exponent
+        else:
+            self.identity = charg3.Point(0, 0, True)
+            q = curve.field.module
+        # Hasse: the number of points is at most q + 1 + 2 * sqrt(q)
+        self.bound = q + 1 + 2 * math.isqrt(q) + 2
+        self.order = elementOrder(self) if order is None else order
+
+    def operate(self, a, b):
+        return self.curve.addPoint(a, b)
+
+    def power(self, element, k: int):
+        k %= self.order
+        return self.identity if k == 0 else self.curve.multiplyPoint(element, k)
+
+    @staticmethod
+    def key(element) -> tuple[int, int, bool]:
+        return getattr(element.x, "value", element.x), getattr(element.y, "value", element.y), element.infty
+
+
+class ModularGroup:
+    """
+    Cyclic subgroup of (Z/NZ)* generated by an integer, powers use the montgomery ladder
+    """
+
+    def __init__(self, generator: int, modulus: int, order: int | None = None):
+        self.generator = generator % modulus
+        self.modulus = modulus
+        self.identity = 1
+        self.bound = modulus - 1
+        self.order = elementOrder(self) if order is None else order
+
+    def operate(self, a: int, b: int) -> int:
+        return (a * b) % self.modulus
+
+    def power(self, element: int, k: int) -> int:
+        return ladder(element, k % self.order, self.modulus)
+
+    @staticmethod
+    def key(element: int) -> int:
+        return element
+
+
+def elementOrder(group, max_table_size: int = MAX_TABLE_SIZE) -> int:
+    """
+    Finds the order of the generator with baby-step giant-step: with the table j -> j*G of the first m multiples,
+    the first giant step i*m*G found in it gives the smallest n = i*m - j with n*G = 0
+    :param group: CurveGroup or ModularGroup, only its generator, identity and bound are used
+    :param max_table_size: maximum number of baby steps stored
+    :return: order of the generator
+    """
+    m = min(math.isqrt(group.bound) + 1, max_table_size)
+    identity = group.key(group.identity)
+    table = {}
+    x = group.identity
+    for j in range(m):
+        if j and group.key(x) == identity:
+            return j
+        table[group.key(x)] = j
+        x = group.operate(x, group.generator)
+
+    giant = y = x
+    for i in range(1, group.bound // m + 2):
+        if (j := table.get(group.key(y))) is not None:
+            return i * m - j
+        y = group.operate(y, giant)
+    raise ValueError("Order of the generator exceeds the bound of the group")
+
+
+def babyStepGiantStep(group, target, max_table_size: int = MAX_TABLE_SIZE) -> DiscreteLog:
+    """
+    Solves k*G = target by storing the baby steps target + j*G and searching the giant steps i*m*G, which
+    needs no negation: a match gives k = i*m - j. With the table capped, m shrinks and the giant steps grow.
+    :param group: CurveGroup or ModularGroup
+    :param target: element of the group generated by the generator
+    :param max_table_size: maximum number of baby steps stored
+    :return: discrete logarithm and number of group operations
+    """
+    n = group.order
+    m = min(math.isqrt(n - 1) + 1, max_table_size)
+    table = {}
+    x = target
+    for j in range(m):
+        table.setdefault(group.key(x), j)
+        x = group.operate(x, group.generator)
+
+    giant = group.power(group.generator, m)
+    y = group.identity
+    for i in range(-(-n // m) + 1):
+        if (j := table.get(group.key(y))) is not None:
+            return DiscreteLog((i * m - j) % n, m + i)
+        y = group.operate(y, giant)
+    raise ValueError("Target is not in the group generated by the generator")
+
+
+class RhoDiscreteLog:
+    """
+    Pollard's rho for k*G = target with an r-adding walk: every element is a*G + b*target with known a and b and
+    a step adds one of r precomputed combinations chosen by the hash of the element. Only distinguished
+    elements end a walk and are stored, two walks reaching one with different coefficients give a linear
+    congruence for k. Orders that are not prime are handled by trying all solutions of the congruence.
+    """
+
+    def __init__(self, group, target, partitions: int = 16, distinguished_bits: int | None = None, seed: int = 0):
+        self.group = group
+        self.target = target
+        self.partitions = partitions
+        self.seed = seed
+        n = group.order
+        self.distinguished_bits = n.bit_length() // 4 if distinguished_bits is None else distinguished_bits
+        self.distinguished_mask = (1 << self.distinguished_bits) - 1
+        # walks that did not hit a distinguished point after this many steps are most likely stuck in a cycle
+        self.max_walk_length = 20 << self.distinguished_bits
+
+        rng = random.Random(seed)
+        self.steps = []
+        for _ in range(partitions):
+            a, b = rng.randrange(n), rng.randrange(n)
+            self.steps.append((a, b, self.combine(a, b)))
+
+    def combine(self, a: int, b: int):
+        return self.group.operate(self.group.power(self.group.generator, a), self.group.power(self.target, b))
+
+    def walk(self, walk: int) -> tuple[object, int, int, int] | None:
+        """
+        Iterates a single walk from a random combination until it reaches a distinguished element
+        :param int walk: Index of the walk, selects its start
+        :return: Tuple of (key of the distinguished element, a, b, walk length) or None if the walk was abandoned
+        """
+        n = self.group.order
+        rng = random.Random(f"{self.seed}:{walk}")
+        a, b = rng.randrange(n), rng.randrange(n)
+        try:
+            x = self.combine(a, b)
+            for length in range(1, self.max_walk_length + 1):
+                h = hash(self.group.key(x))
+                step_a, step_b, step = self.steps[h % self.partitions]
+                x = self.group.operate(x, step)
+                a, b = (a + step_a) % n, (b + step_b) % n
+                key = self.group.key(x)
+                if (hash(key) // self.partitions) & self.distinguished_mask == 0:
+                    return key, a, b, length
+        except ValueError:
+            # the curve formulas cannot double a point of order 2, such a walk is dropped
+            pass
+        return None
+
+    def solve(self, first: tuple[int, int], second: tuple[int, int], max_candidates: int = 1 << 16) -> int | None:
+        """
+        Solves a1 + b1*k = a2 + b2*k mod n for two representations of the same element
+        :return: discrete logarithm or None if the collision does not determine it
+        """
+        (a1, b1), (a2, b2) = first, second
+        n = self.group.order
+        g = math.gcd(b1 - b2, n)
+        if g == n or (a2 - a1) % g or g > max_candidates:
+            return None
+        reduced = n // g
+        k = (a2 - a1) // g * pow((b1 - b2) // g, -1, reduced) % reduced
+        target = self.group.key(self.target)
+        for candidate in range(k, n, reduced):
+            if self.group.key(self.group.power(self.group.generator, candidate)) == target:
+                return candidate
+        return None
+
+    def walks(self, first_walk: int, count: int) -> tuple[list[tuple[object, int, int, int]], int]:
+        """
+        Runs a batch of consecutive walks
+        :param int first_walk: Index of the first walk of the batch
+        :param int count: Number of walks in the batch
+        :return: Tuple of (distinguished elements found, number of iterations)
+        """
+        points = []
+        iterations = 0
+        for walk in range(first_walk, first_walk + count):
+            if (result := self.walk(walk)) is None:
+                iterations += self.max_walk_length
+            else:
+                points.append(result)
+                iterations += result[3]
+        return points, iterations
+
+    def parallelSearch(self, processes: int | None = None, batch_size: int = 16) -> DiscreteLog:
+        """
+        Spreads batches of walks across a process pool and merges their distinguished elements into a
+        single table until a collision determines the logarithm
+        :param processes: Number of worker processes, defaults to the number of CPUs
+        :param int batch_size: Number of walks per submitted batch
+        :return: discrete logarithm and number of iterations
+        """
+        endpoints = dict()
+        iterations = 0
+        next_walk = 0
+        processes = processes or os.cpu_count() or 1
+
+        with ProcessPoolExecutor(processes) as executor:
+            pending = set()
+            for _ in range(2 * processes):
+                pending.add(executor.submit(self.walks, next_walk, batch_size))
+                next_walk += batch_size
+
+            while True:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    points, batch_iterations = future.result()
+                    iterations += batch_iterations
+                    for key, a, b, _ in points:
+                        if key not in endpoints:
+                            endpoints[key] = (a, b)
+                        elif (k := self.solve(endpoints[key], (a, b))) is not None:
+                            executor.shutdown(wait=False, cancel_futures=True)
+                            return DiscreteLog(k, iterations)
+
+                    pending.add(executor.submit(self.walks, next_walk, batch_size))
+                    next_walk += batch_size
+
+    def search(self, first_walk: int = 0) -> DiscreteLog:
+        """
+        Runs walks until two of them reach a distinguished element with different coefficients
+        :param int first_walk: Index of the first walk to run
+        :return: discrete logarithm and number of iterations
+        """
+        endpoints = dict()
+        iterations = 0
+        walk = first_walk
+
+        while True:
+            result = self.walk(walk)
+            walk += 1
+            if result is None:
+                iterations += self.max_walk_length
+                continue
+
+            key, a, b, length = result
+            iterations += length
+            if key not in endpoints:
+                endpoints[key] = (a, b)
+            elif (k := self.solve(endpoints[key], (a, b))) is not None:
+                return DiscreteLog(k, iterations)
+
+
+def discreteLog(group, target, algorithm: str = "auto", processes: int = 1,
+                max_table_size: int = MAX_TABLE_SIZE) -> DiscreteLog:
+    """
+    Solves k*G = target (or G^k = target for modular groups)
+    :param group: CurveGroup or ModularGroup
+    :param target: element of the group generated by the generator
+    :param algorithm: "bsgs", "rho" or "auto", which uses baby-step giant-step while its table fits into
+        max_table_size and rho otherwise
+    :param processes: number of processes for rho
+    :param max_table_size: maximum number of baby steps stored
+    :return: discrete logarithm and number of iterations
+    """
+    if algorithm == "auto":
+        algorithm = "bsgs" if math.isqrt(group.order - 1) + 1 <= max_table_size else "rho"
+    if algorithm == "bsgs":
+        return babyStepGiantStep(group, target, max_table_size)
+    rho = RhoDiscreteLog(group, target)
+    return rho.search() if processes == 1 else rho.parallelSearch(processes)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Solves discrete logarithms on small curves and modular groups")
+    group_parser = parser.add_mutually_exclusive_group(required=True)
+    group_parser.add_argument("-c", "--curve", nargs=3, type=int, metavar=("A", "B", "P"),
+                              help="Curve y^2 = x^3 + Ax + B over GF(P)")
+    group_parser.add_argument("-b", "--binary", nargs=4, type=lambda x: int(x, 0), metavar=("A", "B", "M", "POLY"),
+                              help="Curve y^2 + xy = x^3 + Ax^2 + B over GF(2^M) with the reduction polynomial POLY")
+    group_parser.add_argument("-n", "--modulus", type=int, help="Multiplicative group modulo N")
+    parser.add_argument("-g", "--generator", required=True, help="Generator, x,y for curves")
+    parser.add_argument("-t", "--target", required=True, nargs="+", help="Targets, x,y for curves")
+    parser.add_argument("-o", "--order", type=int, help="Order of the generator, found with BSGS if not given")
+    parser.add_argument("-a", "--algorithm", choices=["auto", "bsgs", "rho"], default="auto")
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="Processes for rho, 0 uses all CPUs")
+    parser.add_argument("--table", type=int, default=MAX_TABLE_SIZE, help="Maximum number of baby steps stored")
+
+    args = parser.parse_args()
+    if args.modulus:
+        group = ModularGroup(int(args.generator, 0), args.modulus, args.order)
+        targets = [int(target, 0) for target in args.target]
+    else:
+        if args.curve:
+            curve = charg3.EllipticCurve(*args.curve)
+            point = charg3.Point
+        else:
+            curve = char2.EllipticCurve(*args.binary)
+            point = lambda x, y: char2.Point(x, y, curve.field)
+        group = CurveGroup(curve, point(*(int(x, 0) for x in args.generator.split(","))), args.order)
+        targets = [point(*(int(x, 0) for x in target.split(","))) for target in args.target]
+
+    print(f"ord(G) = {group.order}")
+    for target in targets:
+        result = discreteLog(group, target, args.algorithm, args.jobs or os.cpu_count() or 1, args.table)
+        print(f"log({target}) = {result.value} after {result.iterations} iterations")
@@ -0,0 +1,200 @@
+import argparse
+import os
+import sys
+from functools import lru_cache
+
+import numpy as np
+
+ROUNDS = 32
+BLOCK_SIZE = 16
+# Number of blocks encrypted at once when processing files
+CHUNK_BLOCKS = 1 << 16
+MASK_64 = (1 << 64) - 1
+MASK_128 = (1 << 128) - 1
+
+
+def generateSbox() -> np.ndarray:
+    """
+    S-box of Schiffy as in main.rs: sbox[0] = 170, sbox[i] = 37 * sbox[i - 1] + 9 mod 256
+    :return: uint8 array of the 256 S-box values
+    """
+    sbox = [170]
+    for _ in range(255):
+        sbox.append((37 * sbox[-1] + 9) % 256)
+    return np.array(sbox, dtype=np.uint8)
+
+
+SBOX = generateSbox()
+
+
+@lru_cache(maxsize=16)
+def ksa(key: int) -> tuple[int, ...]:
+    """
+    Key scheduling as in main.rs, K_0 = key ^ 0xabcdef and K_i = rotl(K_(i-1), 7i) ^ 0xabcdef
+    :param key: 128-bit key
+    :return: the 32 round keys, computed once per key
+    """
+    round_keys = [key ^ 0xabcdef]
+    for i in range(1, ROUNDS):
+        rotation = 7 * i % 128
+        previous = round_keys[-1]
+        rotated = ((previous << rotation) | (previous >> (128 - rotation))) & MASK_128
+        round_keys.append(rotated ^ 0xabcdef)
+    return tuple(round_keys)
+
+
+def feistel(block: np.ndarray, key: int) -> np.ndarray:
+    """
+    Round function for many 64-bit halves at once: XOR with the upper key half, every byte through the S-box,
+    XOR with the lower key half. The S-box works bytewise, so the byte order of the lanes does not matter.
+    :param block: uint64 array of block halves
+    :param key: 128-bit round key
+    :return: uint64 array of the results
+    """
+    block = block ^ np.uint64(key >> 64)
+    block = SBOX[block.view(np.uint8)].view(np.uint64)
+    return block ^ np.uint64(key & MASK_64)
+
+
+class Schiffy:
+    """
+    Schiffy-128 with the round keys of one key precomputed. Blocks are processed as two uint64 arrays of left and
+    right halves, so every round is a few NumPy operations over all blocks instead of a loop over the blocks.
+    """
+
+    def __init__(self, key: int):
+        self.round_keys = ksa(key)
+
+    def encryptLanes(self, left: np.ndarray, right: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        for round_key in self.round_keys:
+            left, right = right, feistel(right, round_key) ^ left
+        return left, right
+
+    def decryptLanes(self, left: np.ndarray, right: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        for round_key in reversed(self.round_keys):
+            left, right = feistel(left, round_key) ^ right, left
+        return left, right
+
+    @staticmethod
+    def toLanes(data: bytes) -> tuple[np.ndarray, np.ndarray]:
+        blocks = np.frombuffer(data, dtype=">u8").reshape(-1, 2).astype(np.uint64)
+        return blocks[:, 0].copy(), blocks[:, 1].copy()
+
+    @staticmethod
+    def fromLanes(left: np.ndarray, right: np.ndarray) -> bytes:
+        blocks = np.empty((len(left), 2), dtype=">u8")
+        blocks[:, 0], blocks[:, 1] = left, right
+        return blocks.tobytes()
+
+    def encryptECB(self, data: bytes) -> bytes:
+        """
+        Encrypts every 16-byte block on its own. A shorter last block is padded with leading zero bytes, as main.rs
+        parses a short last hex chunk as a smaller number.
+        :param data: plaintext
+        :return: ciphertext, a multiple of 16 bytes
+        """
+        if rest := len(data) % BLOCK_SIZE:
+            data = data[:len(data) - rest] + bytes(BLOCK_SIZE - rest) + data[len(data) - rest:]
+        return self.fromLanes(*self.encryptLanes(*self.toLanes(data)))
+
+    def decryptECB(self, data: bytes) -> bytes:
+        if len(data) % BLOCK_SIZE:
+            raise ValueError("Ciphertext must be a multiple of 16 bytes")
+        return self.fromLanes(*self.decryptLanes(*self.toLanes(data)))
+
+    def ctr(self, data: bytes, nonce: int = 0, counter: int = 0) -> bytes:
+        """
+        Counter mode, encryption and decryption are the same. The counter blocks are nonce || counter + i, so
+        there is no padding and the keystream of all blocks is computed at once.
+        :param data: plaintext or ciphertext of any length
+        :param nonce: 64-bit nonce, the left half of the counter blocks
+        :param counter: counter of the first block, e.g. to continue after a previous chunk
+        :return: data XOR keystream
+        """
+        blocks = -(-len(data) // BLOCK_SIZE)
+        left = np.full(blocks, nonce, dtype=np.uint64)
+        right = np.arange(counter, counter + blocks, dtype=np.uint64)
+        keystream = self.fromLanes(*self.encryptLanes(left, right))[:len(data)]
+        return (np.frombuffer(data, dtype=np.uint8) ^ np.frombuffer(keystream, dtype=np.uint8)).tobytes()
+
+
+def crypt(message: str, key: int, decrypt: bool = False) -> str:
+    """
+    Hex interface of crypt in main.rs
+    :param message: hex string, optionally prefixed with 0x
+    :param key: 128-bit key
+    :param decrypt: decrypts instead of encrypting
+    :return: hex of the ciphertext, or the plaintext decoded as utf-8 on decryption
+    """
+    message = message.removeprefix("0x")
+    # like main.rs, a short last chunk is parsed as number and thereby padded with leading zeros
+    data = b"".join(int(message[i:i + 32], 16).to_bytes(BLOCK_SIZE, 'big') for i in range(0, len(message), 32))
+    cipher = Schiffy(key)
+    if decrypt:
+        return cipher.decryptECB(data).decode(errors="replace")
+    return cipher.encryptECB(data).hex()
+
+
+def test():
+    assert list(SBOX[[0, 1, 2, 123, 255]]) == [170, 155, 112, 33, 205]
+
+    round_keys = ksa(0xdeadbeef000000000000000badc0ffee)
+    assert round_keys[0] == 0xdeadbeef000000000000000bad6b3201
+    assert round_keys[1] == 0x56df778000000000000005d6b532cd00
+    assert round_keys[2] == 0xdde00000000000000175ad4cb3ebd858
+    assert round_keys[31] == 0x770feb4b3180dc3bc09870bd38e2cb5f
+
+    blocks = np.array([0x0000000000000000, 0x94dfb49607c198ab, 0xb0aa7cca50e95fb1, 0x8a42d7b2eeb9add8,
+                       0xc8ef99ba72f8a579, 0x81f3d4d01743d570, 0xb743f2fb342c51bf], dtype=np.uint64)
+    expected = [0x94dfb49607c198ab, 0xb0aa7cca50e95fb1, 0x1e9d6324e9783573, 0x01a6283b0f33c8f0,
+                0xf7ffea032144154a, 0x7fac6b4146d4f4c6, 0x2a66d3471f7cb499]
+    for block, i, result in zip(blocks, [0, 1, 2, 3, 29, 30, 31], expected):
+        assert int(feistel(np.array([block]), round_keys[i])[0]) == result
+
+    assert crypt("0x00000000000000000000000000000000", 0xdeadbeef000000000000000badc0ffee) == \
+           "b743f2fb342c51bfab950797083f61e9"
+    assert crypt("2aed234f7ceda0ba9a89118bc0a0b93fe5b820aac165b97e3ad6338d23cb5858",
+                 0x08150000000000000000000000004711, True) == "--> https://tinyurl.com/4h6tbznj"
+
+    cipher = Schiffy(0x08150000000000000000000000004711)
+    data = bytes(range(256)) * 5
+    assert cipher.decryptECB(cipher.encryptECB(data)) == data
+    assert cipher.ctr(cipher.ctr(data[:1000], 7), 7) == data[:1000]
+    assert cipher.ctr(data, 7)[512:] == cipher.ctr(data[512:], 7, 32)
+    print("All tests passed")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Schiffy-128 bulk encryption of files")
+    parser.add_argument("-k", "--key", type=lambda x: int(x, 16), default=0x08150000000000000000000000004711,
+                        help="128-bit key in hex")
+    parser.add_argument("-m", "--mode", choices=["ecb", "ctr"], default="ecb")
+    parser.add_argument("-n", "--nonce", type=lambda x: int(x, 16), default=0, help="64-bit CTR nonce in hex")
+    parser.add_argument("-d", "--decrypt", action="store_true", help="Decrypt instead of encrypt (ECB)")
+    parser.add_argument("-t", "--test", action="store_true", help="Check the test vectors of main.rs")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("-i", "--input", help="Input file")
+    source.add_argument("-z", "--zeros", type=int, metavar="BYTES", help="Encrypt this many zero bytes")
+    parser.add_argument("output", nargs="?", help="Output file, e.g. for create_histogram.py")
+
+    args = parser.parse_args()
+    if args.test:
+        test()
+        sys.exit()
+    if args.output is None or (args.input is None and args.zeros is None):
+        parser.error("an input file or --zeros and an output file are required")
+
+    schiffy = Schiffy(args.key)
+    chunk_size = CHUNK_BLOCKS * BLOCK_SIZE
+    with open(args.input or os.devnull, 'rb') as f, open(args.output, 'wb') as out:
+        if args.zeros is not None:
+            chunks = (bytes(min(chunk_size, args.zeros - i)) for i in range(0, args.zeros, chunk_size))
+        else:
+            chunks = iter(lambda: f.read(chunk_size), b"")
+        for i, chunk in enumerate(chunks):
+            if args.mode == "ctr":
+                out.write(schiffy.ctr(chunk, args.nonce, i * CHUNK_BLOCKS))
+            elif args.decrypt:
+                out.write(schiffy.decryptECB(chunk))
+            else:
+                out.write(schiffy.encryptECB(chunk))
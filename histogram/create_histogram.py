@@ -1,25 +1,89 @@
 import argparse
+import hashlib
+import json
+import os
+
 import matplotlib.pyplot as plt
+import numpy as np
+
+CACHE_SUFFIX = ".histcache"
+CHUNK_SIZE = 1 << 20
+# Blocks of the counted prefix that the fingerprint of the cache samples besides its end
+SAMPLE_COUNT = 8
+SAMPLE_SIZE = 1 << 16
 
 
-def readFile(filename: str, stride: int) -> dict[int, list[int]]:
+def fingerprint(f, length: int) -> str:
+    """
+    SHA-256 of the length of the counted prefix, its last CHUNK_SIZE bytes and SAMPLE_COUNT blocks spread evenly over
+    it. The read is bounded, so checking the cache costs the same for any file size. A rewrite of the prefix that
+    misses all sampled blocks is not detected.
+    :param f: File opened in binary mode
+    :param int length: Length of the counted prefix
+    :return: Hex digest
+    """
+    digest = hashlib.sha256(str(length).encode())
+    blocks = [(length * i // SAMPLE_COUNT, SAMPLE_SIZE) for i in range(SAMPLE_COUNT)]
+    blocks.append((max(length - CHUNK_SIZE, 0), CHUNK_SIZE))
+    for start, size in blocks:
+        f.seek(start)
+        digest.update(f.read(min(size, length - start)))
+    return digest.hexdigest()
+
+
+def countTail(f, offset: int, counts: np.ndarray) -> int:
+    """
+    Adds the bytes from offset to the end of the file to the counts of their stride lanes
+    :param f: File opened in binary mode
+    :param int offset: Position to start counting at
+    :param counts: Array of shape (stride, 256) that is updated in place
+    :return: Offset of the end of the file
     """
-    Read input file and return a list of byte values
-    :param stride: Stride of histogram bins
+    stride = len(counts)
+    f.seek(offset)
+    while chunk := f.read(CHUNK_SIZE):
+        values = np.frombuffer(chunk, dtype=np.uint8)
+        for lane in range(stride):
+            # byte i of the file belongs to lane i % stride
+            counts[lane] += np.bincount(values[(lane - offset) % stride::stride], minlength=256)
+        offset += len(chunk)
+    return offset
+
+
+def countFile(filename: str, stride: int, cache: bool = False) -> np.ndarray:
+    """
+    Counts the byte values of the given file per stride lane. With the cache, the counts are stored in a sidecar
+    file together with the counted offset, size, mtime and a fingerprint of the counted prefix, so later runs on
+    a grown file only count the appended tail. All of the file is counted again if the fingerprint changed.
     :param str filename: Name of the file to read
-    :return: List of byte values in the given file
+    :param int stride: Stride of histogram bins, 0 counts all bytes in one lane
+    :param bool cache: Read and update the sidecar cache file
+    :return: Array of shape (stride, 256) with the count of every byte value per lane
     """
-    byte_list = []
-    output = {}
+    counts = np.zeros((stride or 1, 256), dtype=np.int64)
+    offset = 0
+    stat = os.stat(filename)
+    cache_filename = filename + CACHE_SUFFIX
+
     with open(filename, 'rb') as f:
-        while read_byte := f.read(1):
-            byte_list.append(int.from_bytes(read_byte, byteorder='little'))
-    if stride:
-        for i in range(stride):
-            output[i] = byte_list[i::stride]
-    else:
-        output[0] = byte_list
-    return output
+        if cache and os.path.exists(cache_filename):
+            with open(cache_filename) as c:
+                cached = json.load(c)
+            if cached["stride"] == len(counts):
+                if (cached["size"], cached["mtime_ns"]) == (stat.st_size, stat.st_mtime_ns):
+                    return np.array(cached["counts"], dtype=np.int64)
+                if cached["offset"] <= stat.st_size and fingerprint(f, cached["offset"]) == cached["fingerprint"]:
+                    counts[:] = cached["counts"]
+                    offset = cached["offset"]
+
+        offset = countTail(f, offset, counts)
+        if cache:
+            cached = {"stride": len(counts), "offset": offset, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns,
+                      "fingerprint": fingerprint(f, offset), "counts": counts.tolist()}
+            with open(cache_filename + ".tmp", 'w') as c:
+                json.dump(cached, c)
+            os.replace(cache_filename + ".tmp", cache_filename)
+    return counts
 
 
 def createPercentagePlot(byte_list: dict[int, float], out_filename: str, stride: int) -> None:
@@ -37,39 +101,30 @@ def createPercentagePlot(byte_list: dict[int, float], out_filename: str, stride:
     fig.savefig(out_filename)
 
 
-def createAbsolutePlot(data: list[int], out_filename: str, stride: int) -> None:
+def createAbsolutePlot(counts: list[int], out_filename: str, stride: int) -> None:
     """
-    Create plot from given array with byte values with absolute values, that is shown and saved
+    Create plot from the counts of the byte values with absolute values, that is shown and saved
     :param stride: Given bin
     :param str out_filename: Name of the output file
-    :param list[int] data: Array with byte values
+    :param list[int] counts: Number of occurrences of every byte value
     """
     fig, ax = plt.subplots()
-    ax.hist(data, bins=range(256))
+    ax.hist(range(256), bins=range(256), weights=counts)
     ax.set_xlabel('Byte values')
     ax.set_ylabel('Absolute distribution')
     ax.set_title(f'Absolute distribution of byte values (bin {stride})')
     fig.savefig(out_filename)
 
 
-def createStatisticalDistribution(data: list[int], percentage: bool) -> dict[int, float]:
+def createStatisticalDistribution(counts: list[int], percentage: bool) -> dict[int, float]:
     """
-    Create statistical distribution from given array with byte values and print it out
-    :param list[int] data: Provided data as a list of integer values
+    Create statistical distribution from the counts of the byte values
+    :param list[int] counts: Number of occurrences of every byte value
     :param bool percentage: Calculates percentage distribution
     :return: Dictionary of statistical distribution
     """
-    distribution = {}
-    for d in data:
-        if distribution.get(d):
-            distribution[d] += 1
-        else:
-            distribution[d] = 1
-    if percentage:
-        for key in distribution.keys():
-            distribution[key] /= len(data)
-    sorted_dict = {key: distribution[key] if distribution.get(key) else 0 for key in range(256)}
-    return sorted_dict
+    total = sum(counts) if percentage and sum(counts) else 1
+    return {key: counts[key] / total if percentage else counts[key] for key in range(256)}
 
 
 def main():
@@ -81,17 +136,19 @@ def main():
                         help='Give percentages in statistical distribution (absolute values if not provided)',
                         action='store_true')
     parser.add_argument('-s', '--stride', help='Stride of histogram plot', type=int, default=1)
+    parser.add_argument('-c', '--cache', action='store_true',
+                        help=f'Keep the counts in <filename>{CACHE_SUFFIX} and only read what was appended since')
     parser.add_argument('filename', help='Name of the file to read')
     parser.add_argument('out_filename', help='Name of the output file')
 
     args = parser.parse_args()
-    data = readFile(args.filename, args.stride)
+    counts = countFile(args.filename, args.stride, args.cache)
     for i in range(args.stride):
         if args.percentage:
-            percentage_data = createStatisticalDistribution(data[i], args.percentage)
+            percentage_data = createStatisticalDistribution(counts[i].tolist(), args.percentage)
             createPercentagePlot(percentage_data, args.out_filename + str(i) + '.png', i)
         else:
-            createAbsolutePlot(data[i], args.out_filename + str(i) + '.png', i)
+            createAbsolutePlot(counts[i].tolist(), args.out_filename + str(i) + '.png', i)
 
 
 if __name__ == '__main__':
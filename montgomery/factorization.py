@@ -0,0 +1,255 @@
+import argparse
+import math
+from array import array
+from functools import lru_cache
+
+from montgomery import montgomery_ladder
+
+# Bases of the Miller-Rabin test, deterministic for all n < 3.3 * 10^24
+WITNESSES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)
+# Number of products collected before one gcd is taken in stage 2 of p-1 and in rho
+GCD_BATCH = 256
+
+
+def primesUpTo(bound: int) -> list[int]:
+    """
+    Sieve of Eratosthenes
+    :param bound: largest number to consider
+    :return: all primes <= bound
+    """
+    if bound < 2:
+        return []
+    sieve = bytearray([1]) * (bound + 1)
+    sieve[0] = sieve[1] = 0
+    for p in range(2, math.isqrt(bound) + 1):
+        if sieve[p]:
+            sieve[p * p::p] = bytes(len(range(p * p, bound + 1, p)))
+    return [p for p, is_prime in enumerate(sieve) if is_prime]
+
+
+@lru_cache(maxsize=8)
+def stageOneExponent(bound: int) -> int:
+    """
+    Product of the largest powers p^e <= bound of all primes p <= bound, computed once per bound
+    :param bound: smoothness bound B1
+    :return: exponent of stage 1 of p-1
+    """
+    exponent = 1
+    for p in primesUpTo(bound):
+        power = p
+        while power * p <= bound:
+            power *= p
+        exponent *= power
+    return exponent
+
+
+@lru_cache(maxsize=8)
+def primeGaps(bound1: int, bound2: int) -> tuple[int, array]:
+    """
+    Differences between consecutive primes in (bound1, bound2], stage 2 steps from prime to prime with them
+    :return: tuple of (first prime above bound1, gaps to the following primes)
+    """
+    primes = [p for p in primesUpTo(bound2) if p > bound1]
+    if not primes:
+        return 0, array('H')
+    return primes[0], array('H', (q - p for p, q in zip(primes, primes[1:])))
+
+
+def isProbablePrime(n: int) -> bool:
+    """
+    Miller-Rabin test with fixed bases, using the montgomery ladder for the powers
+    :param n: number to test
+    :return: False if n is composite, True if it is prime (certainly for n < 3.3 * 10^24)
+    """
+    if n < 2:
+        return False
+    for p in WITNESSES:
+        if n % p == 0:
+            return n == p
+
+    d, s = n - 1, 0
+    while d % 2 == 0:
+        d, s = d // 2, s + 1
+    for a in WITNESSES:
+        x = montgomery_ladder.ladder(a, d, n)
+        if x == 1 or x == n - 1:
+            continue
+        for _ in range(s - 1):
+            x = x * x % n
+            if x == n - 1:
+                break
+        else:
+            return False
+    return True
+
+
+def pollardPm1(n: int, bound1: int = 10_000, bound2: int = 1_000_000, base: int = 2) -> int | None:
+    """
+    Pollard's p-1 method: finds a prime factor p when p-1 is bound1-smooth except for one prime <= bound2.
+    Stage 1 raises the base to the cached exponent with the montgomery ladder, stage 2 walks from prime to
+    prime through the gap table multiplying with precomputed powers b^gap and takes one gcd per batch.
+    :param n: composite number to factor
+    :param bound1: stage 1 bound
+    :param bound2: stage 2 bound, stage 2 is skipped if it is not larger than bound1
+    :param base: base of the powers
+    :return: non-trivial factor of n or None
+    """
+    b = montgomery_ladder.ladder(base, stageOneExponent(bound1), n)
+    g = math.gcd(b - 1, n)
+    if 1 < g < n:
+        return g
+    if g == n:
+        return None
+
+    first, gaps = primeGaps(bound1, bound2)
+    if not first:
+        return None
+    # b^d for every even gap d
+    square = b * b % n
+    steps = [1, b, square]
+    while len(steps) <= max(gaps, default=2):
+        steps += [0, steps[-1] * square % n]
+
+    x = montgomery_ladder.ladder(b, first, n)
+    product = x - 1
+    for i, gap in enumerate(gaps, 1):
+        x = x * steps[gap] % n
+        product = product * (x - 1) % n
+        if i % GCD_BATCH == 0:
+            g = math.gcd(product, n)
+            if g == n:
+                return None
+            if g > 1:
+                return g
+    # the last partial batch, or the only prime of stage 2 if there are no gaps
+    g = math.gcd(product, n)
+    return g if 1 < g < n else None
+
+
+def brentRho(n: int, c: int = 1, start: int = 2, max_iterations: int | None = None) -> int | None:
+    """
+    Pollard-Brent rho with f(x) = x^2 + c: Brent's cycle detection with the differences multiplied up and one
+    gcd per batch. If a batch jumps over the factor to gcd n, its steps are repeated one gcd at a time.
+    :param n: composite number to factor
+    :param c: constant of the iteration, a different one gives a new walk
+    :param start: start value of the walk
+    :param max_iterations: number of iterations before giving up, unlimited by default
+    :return: non-trivial factor of n or None
+    """
+    if n % 2 == 0:
+        return 2
+    y, r, q, g = start, 1, 1, 1
+    iterations = 0
+    while g == 1:
+        x = y
+        for _ in range(r):
+            y = (y * y + c) % n
+        k = 0
+        while k < r and g == 1:
+            saved = y
+            for _ in range(min(GCD_BATCH, r - k)):
+                y = (y * y + c) % n
+                q = q * abs(x - y) % n
+            g = math.gcd(q, n)
+            k += GCD_BATCH
+        iterations += 2 * r
+        if max_iterations is not None and iterations > max_iterations and g == 1:
+            return None
+        r *= 2
+
+    if g == n:
+        while True:
+            saved = (saved * saved + c) % n
+            g = math.gcd(abs(x - saved), n)
+            if g > 1:
+                break
+    return g if g < n else None
+
+
+def factorize(n: int, bound1: int = 10_000, bound2: int = 1_000_000) -> list[int]:
+    """
+    Full factorization by trial division, p-1 and then rho with changing constants
+    :param n: number to factor
+    :return: sorted prime factors with multiplicity
+    """
+    factors = []
+    for p in primesUpTo(1000):
+        while n % p == 0:
+            factors.append(p)
+            n //= p
+
+    remaining = [n] if n > 1 else []
+    while remaining:
+        m = remaining.pop()
+        if isProbablePrime(m):
+            factors.append(m)
+            continue
+        if (root := math.isqrt(m)) ** 2 == m:
+            remaining += [root, root]
+            continue
+        d = pollardPm1(m, bound1, bound2)
+        c = 1
+        while d is None:
+            d = brentRho(m, c)
+            c += 1
+        remaining += [d, m // d]
+    return sorted(factors)
+
+
+def productTree(values: list[int]) -> list[list[int]]:
+    """
+    Levels of pairwise products, the first level are the values and the last one their product
+    """
+    tree = [values]
+    while len(tree[-1]) > 1:
+        level = tree[-1]
+        tree.append([math.prod(level[i:i + 2]) for i in range(0, len(level), 2)])
+    return tree
+
+
+def batchGCD(moduli: list[int]) -> list[int]:
+    """
+    Bernstein's batch GCD: gcd(n_i, product of all other moduli) for every modulus with one product tree and
+    one remainder tree of P mod n_i^2, instead of a gcd for every pair
+    :param moduli: e.g. RSA moduli
+    :return: gcd per modulus, a value > 1 is a shared prime (or the modulus itself if both primes are shared)
+    """
+    tree = productTree(moduli)
+    remainders = tree[-1]
+    for level in reversed(tree[:-1]):
+        remainders = [remainders[i // 2] % (value * value) for i, value in enumerate(level)]
+    return [math.gcd(remainder // n, n) for remainder, n in zip(remainders, moduli)]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Factors numbers with Pollard p-1 and rho or finds shared primes "
+                                                 "of many moduli with batch GCD")
+    parser.add_argument("numbers", type=lambda x: int(x, 0), nargs="*", help="Numbers to factor")
+    parser.add_argument("-f", "--file", help="File with one number per line, decimal or 0x hex")
+    parser.add_argument("-b", "--batch", action="store_true", help="Only search shared primes with batch GCD")
+    parser.add_argument("-m", "--method", choices=["auto", "pm1", "rho"], default="auto")
+    parser.add_argument("--b1", type=int, default=10_000, help="Stage 1 bound of p-1")
+    parser.add_argument("--b2", type=int, default=1_000_000, help="Stage 2 bound of p-1")
+
+    args = parser.parse_args()
+    numbers = args.numbers
+    if args.file:
+        with open(args.file) as f:
+            numbers += [int(line, 0) for line in f if line.strip()]
+
+    if args.batch:
+        for i, (n, g) in enumerate(zip(numbers, batchGCD(numbers))):
+            if g == n:
+                print(f"{i}: all primes of {n:#x} are shared, compare the moduli pairwise")
+            elif g > 1:
+                print(f"{i}: {n:#x} = {g:#x} * {n // g:#x}")
+    else:
+        for n in numbers:
+            if args.method == "pm1":
+                factor = pollardPm1(n, args.b1, args.b2)
+                print(f"{n} = {factor} * {n // factor}" if factor else f"p-1 found no factor of {n}")
+            elif args.method == "rho":
+                factor = brentRho(n)
+                print(f"{n} = {factor} * {n // factor}" if factor else f"rho found no factor of {n}")
+            else:
+                print(f"{n} = {' * '.join(map(str, factorize(n, args.b1, args.b2)))}")
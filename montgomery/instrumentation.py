@@ -0,0 +1,27 @@
+from collections import Counter
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+# Hooks of the montgomery ladder, multiexp and the curves of ecdsa and elliptic-curve-points, both are off (None)
+# by default and checked before anything is recorded or formatted. Counter names: "multiply", "square" and "inverse"
+# for modular and field operations, "add" and "double" for points.
+operations: Counter | None = None
+tracer: Callable[[str], None] | None = None
+
+
+@contextmanager
+def instrumented(counter: Counter | None = None, trace: Callable[[str], None] | None = None) -> Iterator[Counter]:
+    """
+    Records the modular multiplications, squarings and inversions, point additions and doublings while the context
+    is active
+    :param counter: Counter to record into, a new one is created if not given
+    :param trace: Callable receiving step-by-step trace messages, e.g. print
+    :return: Counter of operation name to number of executions
+    """
+    global operations, tracer
+    previous = operations, tracer
+    operations, tracer = Counter() if counter is None else counter, trace
+    try:
+        yield operations
+    finally:
+        operations, tracer = previous
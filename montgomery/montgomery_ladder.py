@@ -1,8 +1,10 @@
 import argparse
-import math
 
+from montgomery import instrumentation
+from montgomery.instrumentation import instrumented
 
-def ladder(a: int, k: int, N: int, debug=False) -> int:
+
+def ladder(a: int, k: int, N: int) -> int:
     """
     Calculates the given term using the montgomery ladder algorithm
     :param a: base
@@ -13,11 +15,11 @@ def ladder(a: int, k: int, N: int, debug=False) -> int:
     x = 1
     y = a % N
 
-    if debug:
-        print("Step 0: x =", x, ", y =", y)
+    if instrumentation.tracer is not None:
+        instrumentation.tracer(f"Step 0: x = {x} , y = {y}")
 
-    # Get bit length l of k (using log2) and generate a list [l, l-1, ..., 1, 0] that is then iterated
-    for i in range(math.ceil(math.log(k, 2)) - 1, -1, -1):
+    # Get bit length l of k and generate a list [l-1, l-2, ..., 1, 0] that is then iterated
+    for i in range(k.bit_length() - 1, -1, -1):
         # Shift k right by i (get i-th bit) and check if it is 0
         if (k >> i) & 0x01 == 0:
             y = (x * y) % N
@@ -26,10 +28,13 @@ def ladder(a: int, k: int, N: int, debug=False) -> int:
         else:
             x = (x * y) % N
             y = (y * y) % N
+        if instrumentation.operations is not None:
+            instrumentation.operations["multiply"] += 1
+            instrumentation.operations["square"] += 1
 
         # Print out step overview
-        if debug:
-            print(f"After Step {math.ceil(math.log(k, 2)) - i}: i = {i}, x = {x}, y = {y}, b_i was: {(k >> i) & 0x01}")
+        if instrumentation.tracer is not None:
+            instrumentation.tracer(f"After Step {k.bit_length() - i}: i = {i}, x = {x}, y = {y}, b_i was: {(k >> i) & 0x01}")
 
     return x
 
@@ -0,0 +1,143 @@
+import argparse
+import random
+import time
+
+from montgomery import instrumentation, montgomery_ladder
+
+
+class MultiExponentiation:
+    """
+    Straus' simultaneous exponentiation of a_1^x_1 * ... * a_k^x_k mod N with one shared chain of squarings.
+    The table holds the products of all combinations of base powers a_i^d_i with digits d_i < 2^window and is
+    built once for the bases, so a batch of exponent tuples for the same bases reuses it.
+    With window 1 this is Shamir's trick with the 2^k products of subsets of the bases.
+    """
+
+    def __init__(self, bases: list[int], N: int, window: int = 1):
+        """
+        :param bases: bases a_1, ..., a_k
+        :param N: modulus
+        :param window: number of exponent bits processed per step, the table has 2^(k * window) entries
+        """
+        self.N = N
+        self.window = window
+        self.count = len(bases)
+        # table[sum(d_i << (window * i))] = prod(a_i^d_i)
+        self.table = [1 % N]
+        for i, base in enumerate(bases):
+            powers = [1 % N, base % N]
+            for _ in range(2, 1 << window):
+                powers.append(powers[-1] * base % N)
+            self.table = [entry * power % N for power in powers for entry in self.table]
+            if instrumentation.operations is not None:
+                instrumentation.operations["multiply"] += len(self.table) + len(powers) - 2
+
+    def power(self, exponents: list[int]) -> int:
+        """
+        :param exponents: non-negative exponents x_1, ..., x_k
+        :return: a_1^x_1 * ... * a_k^x_k mod N
+        """
+        if len(exponents) != self.count:
+            raise ValueError(f"Expected {self.count} exponents, got {len(exponents)}")
+        if not exponents:
+            raise ValueError("At least one base is needed")
+        if min(exponents) < 0:
+            raise ValueError("Exponents have to be non-negative")
+        mask = (1 << self.window) - 1
+        steps = -(-max(exponents).bit_length() // self.window)
+        x = 1 % self.N
+        squares = multiplies = 0
+        for step in range(steps - 1, -1, -1):
+            shift = step * self.window
+            if x != 1:
+                for _ in range(self.window):
+                    x = x * x % self.N
+                squares += self.window
+            index = 0
+            for i, exponent in enumerate(exponents):
+                index |= ((exponent >> shift) & mask) << (self.window * i)
+            if index:
+                x = x * self.table[index] % self.N
+                multiplies += 1
+        if instrumentation.operations is not None:
+            instrumentation.operations["square"] += squares
+            instrumentation.operations["multiply"] += multiplies
+        return x
+
+    def batch(self, exponent_tuples: list[list[int]]) -> list[int]:
+        """
+        Products of powers of the same bases for many exponent tuples, the table is shared by all of them
+        """
+        return [self.power(exponents) for exponents in exponent_tuples]
+
+
+def multiExp(bases: list[int], exponents: list[int], N: int, window: int = 1) -> int:
+    """
+    Calculates a_1^x_1 * ... * a_k^x_k mod N with a shared squaring chain
+    :param bases: bases a_1, ..., a_k
+    :param exponents: exponents x_1, ..., x_k
+    :param N: modulus
+    :param window: exponent bits per step, 1 is Shamir's trick
+    :return: product of the powers mod N
+    """
+    return MultiExponentiation(bases, N, window).power(exponents)
+
+
+def batchMultiExp(bases: list[int], exponent_tuples: list[list[int]], N: int, window: int = 2) -> list[int]:
+    """
+    multiExp for many exponent tuples of the same bases, e.g. verifying many signatures of one key
+    """
+    return MultiExponentiation(bases, N, window).batch(exponent_tuples)
+
+
+def benchmark(bits: int, count: int, bases: int, seed: int = 0):
+    """
+    Compares products of powers with separate ladder and pow calls against Shamir and Straus multi-exponentiation
+    :param bits: size of modulus and exponents
+    :param count: number of exponent tuples
+    :param bases: number of bases
+    """
+    rng = random.Random(seed)
+    N = rng.getrandbits(bits) | (1 << (bits - 1)) | 1
+    base_values = [rng.randrange(2, N) for _ in range(bases)]
+    tuples = [[rng.getrandbits(bits) for _ in range(bases)] for _ in range(count)]
+
+    def separate(power):
+        results = []
+        for exponents in tuples:
+            x = 1
+            for base, exponent in zip(base_values, exponents):
+                x = x * power(base, exponent, N) % N
+            results.append(x)
+        return results
+
+    candidates = {
+        "ladder": lambda: separate(montgomery_ladder.ladder),
+        "pow": lambda: separate(pow),
+        "shamir": lambda: [multiExp(base_values, exponents, N) for exponents in tuples],
+        "straus w=2": lambda: [multiExp(base_values, exponents, N, 2) for exponents in tuples],
+        "batch w=1": lambda: batchMultiExp(base_values, tuples, N, 1),
+        "batch w=2": lambda: batchMultiExp(base_values, tuples, N, 2),
+    }
+    expected = None
+    print(f"{count} products of {bases} powers, {bits}-bit modulus and exponents")
+    for name, run in candidates.items():
+        with instrumentation.instrumented() as operations:
+            start = time.perf_counter()
+            results = run()
+            seconds = time.perf_counter() - start
+        expected = expected or results
+        assert results == expected, name
+        counts = f"{operations['square']:>9} squarings {operations['multiply']:>9} multiplications" \
+            if operations else " " * 42
+        print(f"{name:>12}: {seconds:8.4f}s {counts}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simultaneous multi-exponentiation a^x * b^y * ... mod N")
+    parser.add_argument("-b", "--bits", type=int, default=1024, help="Bits of modulus and exponents")
+    parser.add_argument("-n", "--count", type=int, default=200, help="Number of products")
+    parser.add_argument("-k", "--bases", type=int, default=2, help="Number of bases")
+
+    args = parser.parse_args()
+    benchmark(args.bits, args.count, args.bases)